@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of the domain helpers on a million-subdomain corpus.
+
+Every name goes through extract_fqdn and extract_base_domain, the pair the
+OSINT handlers call per discovered host. Two corpora are timed: all names
+distinct (cache misses only) and the same count drawn from 100k distinct
+names (repeats, as in real tool output). Known splits are checked first, and
+the run fails if they are wrong or a corpus exceeds --max-seconds.
+
+    python benchmarks/domain_split.py [--names 1000000] [--distinct 100000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from helpers import utils
+
+SUFFIXES = ('com', 'net', 'org', 'io', 'co.uk', 'com.py', 'gov.br', 'com.au', 'org.bo', 'gob.bo')
+BASE_DOMAINS = 2000
+EXPECTED = {
+    'www.example.co.uk': ('www.example.co.uk', 'example.co.uk'),
+    'a.b.agetic.gob.bo': ('a.b.agetic.gob.bo', 'agetic.gob.bo'),
+    'mail.corp.com.py': ('mail.corp.com.py', 'corp.com.py'),
+    'host.example.com.': ('host.example.com', 'example.com'),
+}
+
+
+def corpus(names: int, distinct: int, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    bases = [f"corp{i}.{SUFFIXES[i % len(SUFFIXES)]}" for i in range(BASE_DOMAINS)]
+    pool = [f"h{i}.s{rnd.randrange(100)}.{rnd.choice(bases)}" for i in range(distinct)]
+    if distinct >= names:
+        return pool[:names]
+    return [rnd.choice(pool) for _ in range(names)]
+
+
+def run(names: list) -> float:
+    utils._domain_parts.cache_clear()
+    extract_fqdn, extract_base_domain = utils.extract_fqdn, utils.extract_base_domain
+    start = time.perf_counter()
+    for name in names:
+        extract_fqdn(name)
+        extract_base_domain(name)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=1000000)
+    parser.add_argument('--distinct', type=int, default=100000)
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='Fail when a corpus takes longer than this')
+    args = parser.parse_args()
+
+    failed = False
+    for name, expected in EXPECTED.items():
+        got = (utils.extract_fqdn(name), utils.extract_base_domain(name))
+        if got != expected:
+            print(f"FAIL {name}: {got}, expected {expected}")
+            failed = True
+
+    # First call builds the suffix trie, keep it out of the timings
+    utils.extract_fqdn('warm.up.example.com')
+    for label, distinct in (('distinct', args.names), (f"{args.distinct} distinct", args.distinct)):
+        elapsed = run(corpus(args.names, distinct))
+        print(f"{args.names} names, {label:>15}  {elapsed:6.2f} s  {elapsed / args.names * 1e6:5.2f} us/name")
+        if args.max_seconds is not None and elapsed > args.max_seconds:
+            print(f"FAIL over the {args.max_seconds} s limit")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
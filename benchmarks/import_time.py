@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Guard the start-up cost of the CLI.
+
+Runs `bit00.py --help` under `python -X importtime` and fails when the
+scanner (core.*) or its heavy dependencies are imported before the
+arguments are parsed, or when the best wall time exceeds the budget.
+
+    python benchmarks/import_time.py [--runs 5] [--budget-ms 100]
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BIT00 = os.path.join(ROOT, 'bit00.py')
+
+# Modules --help must not pull in
+FORBIDDEN = ('core', 'tldextract', 'colorama')
+BUDGET_MS = 100.0
+
+
+def imported_modules() -> list:
+    """Names of the modules imported by `bit00.py --help`, from -X importtime."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', BIT00, '--help'],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=ROOT)
+    if proc.returncode != 0:
+        sys.exit(f"bit00.py --help exited with {proc.returncode}:\n{proc.stderr}")
+    modules = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.startswith('import time:') and '|' in line:
+            name = line.rsplit('|', 1)[1].strip()
+            if name != 'imported package':
+                modules.append(name)
+    return modules
+
+
+def wall_time_ms(runs: int) -> float:
+    """Best wall time of `bit00.py --help` over runs, in milliseconds."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, BIT00, '--help'], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, cwd=ROOT, check=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    args = parser.parse_args()
+
+    failed = False
+    modules = imported_modules()
+    leaked = sorted({m for m in modules if m.split('.')[0] in FORBIDDEN})
+    if leaked:
+        print(f"FAIL --help imports {', '.join(leaked)}")
+        failed = True
+    else:
+        print(f"ok   --help imports {len(modules)} modules, none of {', '.join(FORBIDDEN)}")
+
+    best = wall_time_ms(args.runs)
+    if best > args.budget_ms:
+        print(f"FAIL --help took {best:.1f} ms, budget {args.budget_ms:.0f} ms")
+        failed = True
+    else:
+        print(f"ok   --help took {best:.1f} ms (best of {args.runs}), budget {args.budget_ms:.0f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Check that OSINT report generation scales linearly with the log size.
+
+Writes synthetic patterns.log files (about half of the lines are
+duplicates, all under two base domains so every target collects many
+entries) and times modules/osint/report.generate_reports on each, with the
+report writers stubbed out. Fails when the time per line at the largest
+size exceeds --max-ratio times the time per line at the smallest.
+
+    python benchmarks/report_scaling.py [--sizes 250000 500000 1000000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASE_DOMAINS = 2
+DESCS = ('dnsenum', 'info', 'webtech', 'ostech')
+
+
+def load_report_module():
+    path = os.path.join(ROOT, 'modules', 'osint', 'report.py')
+    spec = importlib.util.spec_from_file_location('osint.report', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['osint.report'] = module
+    spec.loader.exec_module(module)
+    # Only the parsing and merging are measured
+    module.generate_osint_text = module.generate_osint_json = module.generate_osint_xml = lambda *args: None
+    return module
+
+
+def write_log(path: str, lines: int, seed: int = 0) -> None:
+    """lines log lines, every other one repeating an earlier line."""
+    rnd = random.Random(seed)
+    written = []
+    with open(path, 'w') as f:
+        for i in range(lines):
+            if written and i % 2:
+                line = rnd.choice(written)
+            else:
+                domain = f"corp{rnd.randrange(BASE_DOMAINS)}.com"
+                host = f"h{i}.{domain}"
+                desc = DESCS[i % len(DESCS)]
+                content = f"A {host} 10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" if desc == 'dnsenum' else f"item-{i} {host}"
+                line = f"[*] [20250101:00.00.00]:subdomain:Bench{i % 7}:{host}:{desc}:{content}\n"
+                if len(written) < 100000:
+                    written.append(line)
+            f.write(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250000, 500000, 1000000])
+    parser.add_argument('--max-ratio', type=float, default=2.0,
+                        help='Allowed growth of the time per line from the smallest to the largest size')
+    args = parser.parse_args()
+
+    report = load_report_module()
+
+    per_line = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sorted(args.sizes):
+            log_path = os.path.join(tmp, f"{size}", 'logs', 'patterns.log')
+            os.makedirs(os.path.dirname(log_path))
+            write_log(log_path, size)
+            start = time.perf_counter()
+            report.generate_reports([log_path], tmp)
+            elapsed = time.perf_counter() - start
+            per_line.append(elapsed / size)
+            print(f"{size:>9} lines  {elapsed:7.2f} s  {elapsed / size * 1e6:6.2f} us/line")
+
+    ratio = per_line[-1] / per_line[0]
+    if ratio > args.max_ratio:
+        print(f"FAIL time per line grew {ratio:.2f}x from the smallest to the largest log")
+        return 1
+    print(f"ok   time per line grew {ratio:.2f}x (limit {args.max_ratio}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
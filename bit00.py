@@ -37,8 +37,98 @@ def gen_cli_args() -> argparse.ArgumentParser:
         metavar="<number>",
         type=int,
         default=10,
-        help="The maximum number of scans to perform per target host. Default: %(default)s"
+        help="Scan cost units per target host. Each tool takes its plugin cost while it runs (1 by default, nmap/naabu port scans 2-8), a tool costing more than this runs alone. Default: %(default)s"
         )    
+    common_parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="<target>",
+        default=None,
+        dest="exclude",
+        help="IP address, CIDR network, range, hostname or file of them to leave out of the scope. Can be repeated."
+        )
+    common_parser.add_argument(
+        "--single-loop",
+        action="store_true",
+        default=False,
+        dest="single_loop",
+        help="Run all targets as coroutines of one event loop instead of one process per target."
+        )
+    common_parser.add_argument(
+        "--max-processes",
+        action="store",
+        metavar="<number>",
+        type=int,
+        default=None,
+        dest="max_processes",
+        help="The maximum number of external tools running across all targets. Default: concurrent targets x concurrent scans"
+        )
+    common_parser.add_argument(
+        "--max-heavy",
+        action="store",
+        metavar="<number>",
+        type=int,
+        default=None,
+        dest="max_heavy",
+        help="The maximum number of heavy scanners (nmap, naabu, nuclei, ...) running across all targets. Default: --max-processes"
+        )
+    common_parser.add_argument(
+        "--host-delay",
+        action="store",
+        metavar="<seconds>",
+        type=float,
+        default=0.0,
+        dest="host_delay",
+        help="Minimum time between two tool launches against the same host. Default: %(default)s"
+        )
+    common_parser.add_argument(
+        "--port-delay",
+        action="store",
+        metavar="<seconds>",
+        type=float,
+        default=0.0,
+        dest="port_delay",
+        help="Minimum time between two tool launches against the same host:port, e.g. 2 to keep web plugins from hitting a port together (slower). Default: %(default)s"
+        )
+    common_parser.add_argument(
+        "--port-concurrency",
+        action="store",
+        metavar="<number>",
+        type=int,
+        default=0,
+        dest="port_concurrency",
+        help="The maximum number of tools running against the same host:port, 0 for no limit. Default: %(default)s"
+        )
+    common_parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        dest="resume",
+        help="Skip the tasks that finished in a previous run (logs/journal.db of each target) and continue from there."
+        )
+    common_parser.add_argument(
+        "--cache-ttl",
+        action="store",
+        metavar="<seconds>",
+        type=float,
+        default=None,
+        dest="cache_ttl",
+        help="How long cached tool output stays valid for the plugins that support it. Default: each plugin's own TTL"
+        )
+    common_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        dest="no_cache",
+        help="Always run the tools instead of replaying cached output (<output>/.cache)."
+        )
+    common_parser.add_argument(
+        "--no-text-log",
+        action="store_true",
+        default=False,
+        dest="no_text_log",
+        help="Only write structured findings (logs/findings.jsonl), not the legacy patterns.log mirror."
+        )
     parser = argparse.ArgumentParser(
         description=rf"""
  ____    _   _      ___     ___  
@@ -76,5 +166,7 @@ Version : {VERSION}
     return args
 
 if __name__ == "__main__":
+    # Parse first, --help and usage errors exit before the scanner is imported
+    cli_args = gen_cli_args()
     from core.core import main
-    main()
\ No newline at end of file
+    main(cli_args)
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""Subprocess budget shared by every worker process of a run."""
+import os
+import asyncio
+import multiprocessing
+
+# Tools that load the scanners or the uplink, capped by --max-heavy
+HEAVY_TOOLS = frozenset({
+    'nmap', 'naabu', 'nuclei', 'netexec', 'spiderfoot', 'theHarvester', 'amass',
+    'sublist3r', 'subfinder', 'fierce', 'cmseek', 'whatweb', 'sslscan', 'enum4linux',
+    'oscanner', 'svwar', 'onesixtyone',
+})
+
+TOTAL, HEAVY = 0, 1
+
+
+def tool_class(cmd: str) -> str:
+    """Return 'heavy' or 'light' from the binary the command runs."""
+    binary = os.path.basename(cmd.split(None, 1)[0]) if cmd and cmd.strip() else ''
+    return 'heavy' if binary in HEAVY_TOOLS else 'light'
+
+
+class ProcessBudget:
+    """Cap on the external tools running across all worker processes.
+
+    Counters live in shared memory and are only touched under a
+    multiprocessing lock, callers poll try_acquire() from their event loop.
+    Besides the total and heavy caps, a target never holds more than its fair
+    share (total / active targets, rounded up) so one busy target can't
+    starve the others.
+    """
+    def __init__(self, total: int, heavy: int = None, poll_interval: float = 0.05, max_poll_interval: float = 0.5):
+        ctx = multiprocessing.get_context()
+        self.total = total
+        self.heavy = min(heavy or total, total)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.lock = ctx.Lock()
+        self.used = ctx.Array('i', 2, lock=False)
+        self.active_targets = ctx.Value('i', 0, lock=False)
+
+    def fair_share(self) -> int:
+        return max(1, -(-self.total // max(1, self.active_targets.value)))
+
+    def try_acquire(self, klass: str, held: int) -> bool:
+        """Take a slot of klass unless a cap is reached, held is what the target already has."""
+        with self.lock:
+            if self.used[TOTAL] >= self.total or held >= self.fair_share():
+                return False
+            if klass == 'heavy' and self.used[HEAVY] >= self.heavy:
+                return False
+            self.used[TOTAL] += 1
+            if klass == 'heavy':
+                self.used[HEAVY] += 1
+            return True
+
+    def release(self, klass: str, usage: list) -> None:
+        usage[0] -= 1
+        with self.lock:
+            self.used[TOTAL] -= 1
+            if klass == 'heavy':
+                self.used[HEAVY] -= 1
+
+    async def acquire(self, klass: str, usage: list) -> None:
+        """Wait for a slot of klass; usage is the target's [held] counter."""
+        delay = self.poll_interval
+        while not self.try_acquire(klass, usage[0]):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+        usage[0] += 1
+
+    def enter_target(self) -> None:
+        with self.lock:
+            self.active_targets.value += 1
+
+    def leave_target(self) -> None:
+        with self.lock:
+            self.active_targets.value -= 1
@@ -0,0 +1,114 @@
+"""Run-wide claims so IP-level work is done once and shared between targets."""
+import os
+import time
+import shutil
+import asyncio
+from typing import Optional
+
+from core.resultcache import ResultCache, CachedResult
+
+CLAIMS_DIR = 'claims'
+# Longest wait for another target's result before running the task anyway
+CLAIM_TIMEOUT = 3600.0
+
+
+class ClaimRegistry:
+    """Claims under <output>/.cache/claims/<run id>, one file per task key.
+
+    The first target to create the claim file (O_EXCL) runs the command and
+    stores its output in the run's own ResultCache; the other targets wait
+    for it and replay the output through their pattern handlers, so the
+    findings are logged for every domain referencing the IP. If the owner
+    fails or dies, the waiters run the command themselves.
+    """
+    def __init__(self, cache_dir: str, run_id: str, poll_interval: float = 0.25, max_poll_interval: float = 2.0):
+        self.root = os.path.join(cache_dir, CLAIMS_DIR, run_id)
+        self.store = ResultCache(self.root)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        os.makedirs(self.root, exist_ok=True)
+
+    def _claim_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.claim")
+
+    def claim(self, key: str) -> bool:
+        """Return True if this process now owns key."""
+        try:
+            fd = os.open(self._claim_path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def failed(self, key: str) -> None:
+        """Release key after the owner's command failed, waiters will run it themselves."""
+        try:
+            os.replace(self._claim_path(key), f"{self._claim_path(key)}.failed")
+        except OSError:
+            pass
+
+    def _owner_alive(self, key: str) -> bool:
+        try:
+            with open(self._claim_path(key)) as f:
+                pid = int(f.read() or 0)
+        except (OSError, ValueError):
+            return False
+        if not pid:
+            # Claim file created but the pid not written yet
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    async def wait(self, key: str, timeout: float = CLAIM_TIMEOUT) -> Optional[CachedResult]:
+        """Wait for the owner's output.
+
+        Returns None when the owner failed or died, the caller should try to
+        claim key again. Raises TimeoutError if the owner takes longer than
+        timeout.
+        """
+        deadline = time.monotonic() + timeout
+        delay = self.poll_interval
+        while time.monotonic() < deadline:
+            result = self.store.get(key, float('inf'))
+            if result is not None:
+                return result
+            if not os.path.exists(self._claim_path(key)):
+                return None
+            if not self._owner_alive(key):
+                try:
+                    os.replace(self._claim_path(key), f"{self._claim_path(key)}.stale")
+                except OSError:
+                    pass
+                return None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+        raise TimeoutError(f"claim {key} not released after {timeout}s")
+
+
+_registry = None
+
+
+def get_claims() -> Optional[ClaimRegistry]:
+    """Return the registry of this run (BIT00_RUN_ID), None outside a run."""
+    global _registry
+    run_id = os.getenv('BIT00_RUN_ID')
+    cache_dir = os.getenv('BIT00_CACHE_DIR')
+    if not run_id or not cache_dir:
+        return None
+    if _registry is None or _registry.root != os.path.join(cache_dir, CLAIMS_DIR, run_id):
+        _registry = ClaimRegistry(cache_dir, run_id)
+    return _registry
+
+
+def remove_run_claims() -> None:
+    """Drop the claims and shared results of this run once every target finished."""
+    run_id = os.getenv('BIT00_RUN_ID')
+    cache_dir = os.getenv('BIT00_CACHE_DIR')
+    if run_id and cache_dir:
+        shutil.rmtree(os.path.join(cache_dir, CLAIMS_DIR, run_id), ignore_errors=True)
@@ -1,7 +1,71 @@
 import asyncio
 import os
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from core.budget import tool_class
+from core.slots import WeightedSemaphore
+from core.ratelimit import get_rate_limiter
 
 LOCK = asyncio.Lock()
-SEMAPHORE = asyncio.Semaphore(int(os.getenv('CONCURRENT_SCANS')))
+SEMAPHORE = WeightedSemaphore(int(os.getenv('CONCURRENT_SCANS')))
 ACTIVE_PROCESS = set()
-RUNNING_TASKS = []
\ No newline at end of file
+RUNNING_TASKS = []
+
+# Set by the single-loop scheduler: scan slots and budget usage of the running target
+TARGET_SLOTS = ContextVar('target_slots', default=None)
+TARGET_USAGE = ContextVar('target_usage', default=None)
+# Set by the single-loop scheduler: waits for the running target's turn among -ct
+TARGET_ADMISSION = ContextVar('target_admission', default=None)
+
+# core.budget.ProcessBudget shared by all the workers of the run
+BUDGET = None
+_PROCESS_USAGE = [0]
+
+
+def install_budget(budget) -> None:
+    """Use budget in this process (also the ProcessPoolExecutor initializer)."""
+    global BUDGET
+    BUDGET = budget
+
+
+async def admit_target() -> None:
+    """Wait until the running target may start its own scans, see TargetScheduler."""
+    admission = TARGET_ADMISSION.get()
+    if admission is not None:
+        await admission()
+
+
+@asynccontextmanager
+async def _held_slots(cmd: str, cost: int):
+    """Hold cost scan slots of the current target and a subprocess slot of the run's budget."""
+    async with (TARGET_SLOTS.get() or SEMAPHORE).slot(cost):
+        if BUDGET is None:
+            yield
+            return
+
+        klass = tool_class(cmd)
+        usage = TARGET_USAGE.get() or _PROCESS_USAGE
+        await BUDGET.acquire(klass, usage)
+        try:
+            yield
+        finally:
+            BUDGET.release(klass, usage)
+
+
+@asynccontextmanager
+async def scan_slot(cmd: str = '', cost: int = 1, host: str = None, port: str = None):
+    """Hold the scan slots and budget of a tool launch against host[:port].
+
+    The pacing turn is awaited without holding anything, then claimed once
+    the slots are held, right before the tool starts. If another launch took
+    the turn meanwhile, the slots are given back and the wait starts over.
+    """
+    limiter = get_rate_limiter()
+    async with limiter.concurrency(host, port):
+        while True:
+            await limiter.wait_turn(host, port)
+            async with _held_slots(cmd, cost):
+                if limiter.claim(host, port):
+                    yield
+                    return
@@ -3,16 +3,22 @@ import time
 import asyncio
 from sys import exit
 from os.path import exists
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 
  # Local libraries and modules
 from bit00 import gen_cli_args
-from helpers.io import error, info, fail
-from helpers.utils import parse_targets, calculate_elapsed_time
+from helpers.io import error, info, fail, warn, set_verbosity
+from helpers.logger import close_logs, flush_logs
+from helpers.utils import expand_targets, invalid_target_specs, aiter_targets, calculate_elapsed_time
+from core.budget import ProcessBudget
+from core.claims import remove_run_claims
 from loaders.pluginsloaders import PluginLoader
 from loaders.modulesloaders import ModulesLoader
 from loaders.reportsloaders import ReportsLoader
 
+# Futures kept in flight per concurrent target, targets are expanded as they are submitted
+TARGETS_BACKLOG = 2
+
 m_loader = ModulesLoader()
 p_loader = PluginLoader()
 
@@ -21,6 +27,11 @@ def run_target(module_path, target, args):
 
     Accepts module_path (string) to avoid pickling class objects. Each worker will load the module file directly.
     """
+    # core.config reads CONCURRENT_SCANS on import, set by main() before the pool starts
+    from core import config
+    budget = config.BUDGET
+    if budget is not None:
+        budget.enter_target()
     try:
         loader = ModulesLoader()
         module_class = loader.load_module(module_path)
@@ -28,44 +39,110 @@ def run_target(module_path, target, args):
         return asyncio.run(instance.execute(target, args))
     except Exception as e:
         return f"Error: {str(e)}"
+    finally:
+        if budget is not None:
+            budget.leave_target()
+        # Pool workers exit without running atexit hooks
+        close_logs()
+
 
+async def start_run(module, args, targets):
+    # Subprocesses of all targets together, shared with every worker
+    budget = ProcessBudget(args.max_processes or args.concurrent_targets * args.concurrent_scans,
+                           heavy=args.max_heavy)
+    if getattr(args, 'sweep', False) and args.targets:
+        # Dead addresses of the scope never reach a worker, the fan-out starts with the first batch
+        from core.sweep import HostSweep
+        targets = HostSweep(args, batch_size=max(1, args.sweep_batch)).run(targets)
 
-async def start_run(module, args, targets):  # noqa: RUF029
-    futures = []
+    if args.single_loop:
+        return await start_single_loop(module, args, targets, budget)
+    if getattr(args, 'batch_portscan', 0) > 1:
+        warn('Argument --batch-portscan needs --single-loop, every target is scanned on its own')
+
+    from core.config import install_budget
+    pending = set()
+    submitted = 0
+    max_pending = args.concurrent_targets * TARGETS_BACKLOG
     start_time = time.time()
-    with ProcessPoolExecutor(max_workers=args.concurrent_targets) as executor:
-        for target in targets:
-            future = executor.submit(run_target, module, target, args)
-            futures.append(future)
-        
+    with ProcessPoolExecutor(max_workers=args.concurrent_targets, initializer=install_budget,
+                             initargs=(budget,)) as executor:
         try:
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    continue
-                except Exception as e:
-                    error(f"Error processing target: {e}")
-        except KeyboardInterrupt:
+            # Awaited, not blocking, so a host sweep keeps running in this loop
+            async for target in aiter_targets(targets):
+                pending.add(asyncio.wrap_future(executor.submit(run_target, module, target, args)))
+                submitted += 1
+                if len(pending) >= max_pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    _collect_results(done)
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                _collect_results(done)
+        except (KeyboardInterrupt, asyncio.CancelledError):
             fail("Interrupted by user")
+    
+    _finish_run(args, submitted, start_time)
+
+
+async def start_single_loop(module, args, targets, budget):
+    """Run every target in this process' event loop, see TargetScheduler."""
+    # core.config reads CONCURRENT_SCANS on import, which main() sets
+    from core.config import install_budget
+    from core.scheduler import TargetScheduler
+
+    install_budget(budget)
+    if getattr(args, 'batch_portscan', 0) > 1:
+        from core.portbatch import PortscanBatcher, install_batcher
+        install_batcher(PortscanBatcher(args.outputdir, args.batch_portscan))
+    start_time = time.time()
+    scheduler = TargetScheduler(m_loader.load_module(module), args)
+    submitted = 0
+    try:
+        submitted = await scheduler.run(targets)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        fail("Interrupted by user")
+    finally:
+        # Reports are built from the logs right after
+        flush_logs()
+
+    _finish_run(args, submitted, start_time)
+
+
+def _finish_run(args, submitted, start_time):
+    if args.targets:
+        if submitted:
+            info(f"Total targets processed: {submitted}")
+        else:
+            error("No valid targets found in the provided input")
         
     if not args.results and not args.list_plugins and args.targets:
         info('{bgreen}Finished all targets in {elapsed_time}!{rst}', 
                           elapsed_time=calculate_elapsed_time(start_time))    
         if "osint" in args.module:
-            osint_loader = ReportsLoader("osint")
+            osint_loader = ReportsLoader("osint", incremental=args.incremental)
             osint_loader.generate_reports()
         else:
-            netscan_loader = ReportsLoader("netscan") 
+            netscan_loader = ReportsLoader("netscan", incremental=args.incremental) 
             netscan_loader.generate_reports()
 
 
-def main() -> None:
-    """Main entry point."""
-    args = gen_cli_args()
-    targets= []
+def _collect_results(futures):
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            error(f"Error processing target: {e}")
+
+
+def main(args=None) -> None:
+    """Main entry point, args are parsed from the command line unless given."""
+    if args is None:
+        args = gen_cli_args()
+    targets = iter(())
     
     if hasattr(args, "verbose") and args.verbose:
-        os.environ['SCANNER_VERBOSE'] = str(args.verbose)
+        set_verbosity(args.verbose)
     
     if args.concurrent_targets <= 0:
         error('Argument -ct/--concurrent-targets: must be at least 1.')
@@ -76,45 +153,72 @@ def main() -> None:
         exit()
     os.environ['CONCURRENT_SCANS'] = str(args.concurrent_scans)
 
+    if args.max_processes is not None and args.max_processes <= 0:
+        error('Argument --max-processes: must be at least 1.')
+        exit()
+
+    if args.max_heavy is not None and args.max_heavy <= 0:
+        error('Argument --max-heavy: must be at least 1.')
+        exit()
+
+    if args.no_text_log:
+        os.environ['BIT00_TEXT_LOG'] = '0'
+
+    if args.resume:
+        os.environ['BIT00_RESUME'] = '1'
+
+    if args.no_cache:
+        os.environ['BIT00_CACHE'] = '0'
+    if args.cache_ttl is not None:
+        os.environ['BIT00_CACHE_TTL'] = str(args.cache_ttl)
+    if hasattr(args, "outputdir"):
+        os.environ['BIT00_CACHE_DIR'] = os.path.abspath(os.path.join(args.outputdir, '.cache'))
+    # Scopes the claims targets use to share IP-level results during this run
+    os.environ['BIT00_RUN_ID'] = f"{int(time.time())}-{os.getpid()}"
+
+    if args.host_delay < 0 or args.port_delay < 0 or args.port_concurrency < 0:
+        error('Arguments --host-delay, --port-delay and --port-concurrency can not be negative.')
+        exit()
+    os.environ['BIT00_HOST_DELAY'] = str(args.host_delay)
+    os.environ['BIT00_PORT_DELAY'] = str(args.port_delay)
+    os.environ['BIT00_PORT_CONCURRENCY'] = str(args.port_concurrency)
+
     if hasattr(args, "targets") and args.targets:
         for target_input in args.targets:
-            try:
-                if exists(target_input) and os.path.isfile(target_input):
-                    # Handle file input - read targets from file
-                    info(f"Reading targets from file: {target_input}")
-                    with open(target_input) as target_file:
-                        for line in target_file:
-                            line = line.strip()
-                            if line and not line.startswith('#'):  # Skip empty lines and comments
-                                targets.extend(parse_targets(line))
-                else:
-                    # Handle direct input (IP, CIDR, domain, etc.)
-                    info(f"Processing target: {target_input}")
-                    targets.extend(parse_targets(target_input))
-                
-            except Exception as e:
-                fail(f"Failed to parse target '{target_input}': {e}")
-                continue
+            if exists(target_input) and os.path.isfile(target_input):
+                # Handle file input - targets are read from it as they are scanned
+                info(f"Reading targets from file: {target_input}")
+            else:
+                # Handle direct input (IP, CIDR, domain, etc.)
+                info(f"Processing target: {target_input}")
         
-        if targets:
-            info(f"Total targets to process: {len(targets)}")
-        else:
-            error("No valid targets found in the provided input")
+        # Reject malformed specs before anything is scanned, only the expansion is lazy
+        invalid = 0
+        for spec, e in invalid_target_specs(list(args.targets) + list(args.exclude or ()),
+                                            on_error=lambda path, e: fail(f"Failed to read targets from '{path}': {e}")):
+            error(f"Failed to parse target '{spec}': {e}")
+            invalid += 1
+        if invalid:
+            fail(f"{invalid} invalid target specifications, nothing was scanned")
+
+        # Expanded lazily, deduplicated across inputs and filtered by --exclude
+        targets = expand_targets(args.targets, args.exclude or (),
+                                 on_error=lambda spec, e: error(f"Skipping target '{spec}': {e}"))
     
     if args.module not in m_loader.get_modules().keys():
         error(f"Error: Module {args.module} not found")
     
     module_path = m_loader.get_modules()[args.module]["path"]
 
-    plugins = p_loader.list_plugins()
+    # Build the plugin registry (from the manifest if plugins/ is unchanged) before forking so workers inherit it
+    module_plugins = p_loader.get_plugins_by_module(args.module)
 
     if args.list_plugins: 
-        module_plugins = {m: props for m, props in plugins.items() if args.module in props["supported_modules"]}
         for plugs, descriptions in module_plugins.items():
             info("{plug} - {description}", plug=plugs, description=descriptions['description'])
     
     if args.module and args.results:
-        loader = ReportsLoader(args.module)
+        loader = ReportsLoader(args.module, incremental=args.incremental)
         loader.generate_reports_from_dir(args.results)
 
     try:
@@ -122,6 +226,8 @@ def main() -> None:
     except KeyboardInterrupt:
         error(f"Got keyboard interrupt")
     finally:
+        # Also on Ctrl-C and fail(), nothing uses the run's claims any more
+        remove_run_claims()
         # results write report
         # db_engine.dispose()    
         info("{bgreen}All tasks completed{rst}")
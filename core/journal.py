@@ -0,0 +1,118 @@
+"""Persistent journal of the tasks run against a target, used by --resume."""
+import os
+import json
+import time
+import sqlite3
+from collections import OrderedDict
+
+JOURNAL_FILE = 'journal.db'
+MAX_OPEN_JOURNALS = 64
+
+RUNNING, DONE, FAILED = 'running', 'done', 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    key TEXT PRIMARY KEY,
+    phase TEXT,
+    cmd TEXT,
+    state TEXT NOT NULL,
+    returncode INTEGER,
+    matches TEXT,
+    updated REAL
+)
+"""
+
+
+class TaskJournal:
+    """SQLite journal of task state transitions in <basedir>/logs/journal.db.
+
+    A task is identified by its tag (phase, plugin[:service], target). Tasks
+    are recorded as running when launched and done or failed when they exit,
+    together with the matches runcommand returned, so a resumed run can hand
+    the same results back to the module without running the tool again.
+    Tasks left running by an interrupted run are simply run again.
+
+    close() only drops the connection: a task still holding the journal
+    (get_journal evicts it while other targets run) reopens it on its next
+    call.
+    """
+    def __init__(self, basedir: str):
+        logs_dir = os.path.join(basedir, 'logs')
+        os.makedirs(logs_dir, exist_ok=True)
+        self.path = os.path.join(logs_dir, JOURNAL_FILE)
+        self._conn = None
+        self.db.execute(_SCHEMA)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    @staticmethod
+    def task_key(tag) -> str:
+        return ':'.join(str(t) for t in tag)
+
+    def completed(self, tag):
+        """Return the stored runcommand result of a finished task, or None."""
+        row = self.db.execute("SELECT returncode, matches FROM tasks WHERE key = ? AND state = ?",
+                              (self.task_key(tag), DONE)).fetchone()
+        if row is None:
+            return None
+        returncode, matches = row
+        return {'returncode': returncode, 'name': tag[0], 'matches': _decode_matches(tag[0], matches)}
+
+    def started(self, tag, cmd: str) -> None:
+        self.db.execute("INSERT OR REPLACE INTO tasks (key, phase, cmd, state, updated) VALUES (?, ?, ?, ?, ?)",
+                        (self.task_key(tag), tag[0], cmd, RUNNING, time.time()))
+
+    def finished(self, tag, returncode: int, matches) -> None:
+        self.db.execute("UPDATE tasks SET state = ?, returncode = ?, matches = ?, updated = ? WHERE key = ?",
+                        (DONE if returncode == 0 else FAILED, returncode, json.dumps(matches),
+                         time.time(), self.task_key(tag)))
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _decode_matches(phase, matches):
+    if matches is None:
+        return None
+    matches = json.loads(matches)
+    if phase == 'portscan' and isinstance(matches, list):
+        # Services are (proto, port, service, version, ttl) tuples
+        return [tuple(m) if isinstance(m, list) else m for m in matches]
+    return matches
+
+
+_journals = OrderedDict()
+_pid = None
+
+
+def get_journal(basedir: str) -> TaskJournal:
+    """Return the journal of basedir, keeping at most MAX_OPEN_JOURNALS open."""
+    global _pid
+    if _pid != os.getpid():
+        # Connections must not cross a fork
+        _journals.clear()
+        _pid = os.getpid()
+
+    journal = _journals.get(basedir)
+    if journal is not None:
+        _journals.move_to_end(basedir)
+        return journal
+
+    journal = _journals[basedir] = TaskJournal(basedir)
+    if len(_journals) > MAX_OPEN_JOURNALS:
+        _, oldest = _journals.popitem(last=False)
+        oldest.close()
+    return journal
+
+
+def resume_enabled() -> bool:
+    """Whether finished tasks are replayed from the journal (--resume, BIT00_RESUME=1)."""
+    return os.getenv('BIT00_RESUME', '0') == '1'
@@ -0,0 +1,241 @@
+"""Portscans of many single-loop targets grouped into one scanner run."""
+import os
+import re
+import time
+import asyncio
+import contextvars
+from itertools import count
+from typing import Optional
+
+from helpers.io import info, error, debug
+from helpers.logger import log_command, log_error, flush_logs
+from helpers.utils import calculate_elapsed_time, is_valid_ip
+from core.journal import get_journal, resume_enabled
+from core.config import scan_slot, admit_target, TARGET_ADMISSION
+from core.runcmd import RegexPatterns, read_lines, decode_line, p_loader
+from loaders.patternsloaders import get_compiled_patterns
+
+BATCH_DIR = '.batch'
+# Seconds a partial batch waits for more targets before it is started
+BATCH_LINGER = 1.0
+# "Nmap scan report for 10.0.0.1" or "Nmap scan report for name (10.0.0.1)"
+REPORT_HEADER = re.compile(rb'^Nmap scan report for (\S+)(?: \((\S+)\))?')
+REPORT_END = (b'Nmap done', b'# Nmap done', b'Read data files from')
+
+
+class _Host:
+    """One target of a batch, fed the lines of its own report block."""
+    def __init__(self, target, tag, output, future):
+        self.target = target
+        self.tag = tag
+        self.output = output
+        self.future = future
+        self.admission = TARGET_ADMISSION.get()
+        self.reader = None
+        self.parser = None
+        self.lines = []
+
+    @property
+    def admitted(self) -> bool:
+        """Whether the target already runs its service scans."""
+        return self.admission is None or self.admission.admitted
+
+
+class PortscanBatcher:
+    """Scan the targets submitted for one portscan plugin batch_size at a time.
+
+    Addresses are written to <output>/.batch/scans/<plugin>-N.txt and scanned
+    by the plugin's batch_cmd (nmap -iL, naabu -list). The scanner's stdout is
+    split on the "Nmap scan report for" headers: each block goes through the
+    portscan patterns into its own target's patterns.log and journal, and
+    resolves that target's submit() as soon as the next header shows up, so
+    its service scans start while the batch keeps running. A target missing
+    from the output finishes with no open ports.
+
+    A partial batch is started after linger seconds without filling up,
+    unless scanned targets are still waiting for their turn among
+    -ct/--concurrent-targets: more of them would only wait as well. A batch
+    holding a target that is already running is never held back.
+    """
+    def __init__(self, outputdir: str, batch_size: int, linger: float = BATCH_LINGER):
+        self.basedir = os.path.abspath(os.path.join(outputdir, BATCH_DIR))
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queued = {}
+        self._timers = {}
+        self._tasks = set()
+        self._index = count()
+        self.ready = 0
+        self.closed = False
+
+    @staticmethod
+    def accepts(plugin, target: str) -> bool:
+        # Names would come back as whatever address the scanner resolved
+        return hasattr(plugin, 'batch_cmd') and is_valid_ip(target)
+
+    def close(self) -> None:
+        """No more targets are coming, start partial batches once they linger."""
+        self.closed = True
+
+    async def submit(self, plugin, plugin_name: str, target: str, tag, output: str, module: str) -> dict:
+        """Queue target for the next batch of plugin_name, return like runcommand().
+
+        Returns once the target is admitted to run its service scans.
+        """
+        result = await self._scan(plugin, plugin_name, target, tag, output, module)
+        self.ready += 1
+        try:
+            await admit_target()
+        finally:
+            self.ready -= 1
+        return result
+
+    async def _scan(self, plugin, plugin_name, target, tag, output, module):
+        tag = list(tag)
+        if resume_enabled():
+            previous = get_journal(output).completed(tag)
+            if previous is not None:
+                info('Skipping {bgreen}{tool}{rst} against {byellow}{target}{rst}, finished in a previous run',
+                     tool=tag[1], target=target)
+                return previous
+
+        loop = asyncio.get_running_loop()
+        queued = self._queued.setdefault(plugin_name, [])
+        queued.append(_Host(target, tag, output, loop.create_future()))
+        host = queued[-1]
+        if len(queued) >= self.batch_size:
+            self._flush(plugin, plugin_name, module)
+        elif plugin_name not in self._timers:
+            self._timers[plugin_name] = loop.call_later(self.linger, self._expire, plugin, plugin_name, module)
+        return await host.future
+
+    def _expire(self, plugin, plugin_name, module):
+        queued = self._queued.get(plugin_name, ())
+        if self.ready and not self.closed and not any(host.admitted for host in queued):
+            loop = asyncio.get_running_loop()
+            self._timers[plugin_name] = loop.call_later(self.linger, self._expire, plugin, plugin_name, module)
+        else:
+            self._flush(plugin, plugin_name, module)
+
+    def _flush(self, plugin, plugin_name, module):
+        timer = self._timers.pop(plugin_name, None)
+        if timer is not None:
+            timer.cancel()
+        hosts = [host for host in self._queued.pop(plugin_name, []) if not host.future.done()]
+        if not hosts:
+            return
+        # A fresh context, the batch must not hold the scan slots of the target that filled it
+        task = contextvars.Context().run(asyncio.create_task, self._run(plugin, plugin_name, module, hosts))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, plugin, plugin_name, module, hosts):
+        name = f"{plugin_name}-{next(self._index)}"
+        try:
+            for subdir in ('gnmap', 'xml'):
+                os.makedirs(os.path.join(self.basedir, 'scans', subdir), exist_ok=True)
+            targets_file = os.path.join(self.basedir, 'scans', f"{name}.txt")
+            with open(targets_file, 'w') as f:
+                f.write('\n'.join(host.target for host in hosts) + '\n')
+            cmd = plugin.batch_cmd(targets_file=targets_file, output=self.basedir, name=name)
+            await self._execute(cmd, plugin_name, module, name, hosts)
+        except Exception as e:
+            error('Batch {bred}{name}{rst} failed: {_e}', name=name, _e=str(e))
+            for host in hosts:
+                if not host.future.done():
+                    host.future.set_exception(e)
+        finally:
+            for host in hosts:
+                if not host.future.done():
+                    host.future.cancel()
+
+    def _open(self, host, regex_pattern, cmd, name):
+        """Start parsing host's report block."""
+        log_command(host.output, host.tag, f"{cmd} (batch {name})")
+        get_journal(host.output).started(host.tag, cmd)
+        host.reader = asyncio.StreamReader()
+        host.parser = asyncio.create_task(regex_pattern.read_stream(host.reader, output=host.output, tag=host.tag))
+
+    async def _close(self, host, returncode, name):
+        """Resolve host's submit() once its block is parsed."""
+        host.reader.feed_eof()
+        matches = await host.parser
+        if host.lines:
+            with open(os.path.join(host.output, 'scans', f"_batch_{host.tag[1]}.txt"), 'wb') as f:
+                f.write(b'\n'.join(host.lines) + b'\n')
+        if returncode != 0:
+            log_error(host.output, host.tag, returncode)
+        # Findings must be written before the journal marks the task as done
+        await asyncio.to_thread(flush_logs)
+        get_journal(host.output).finished(host.tag, returncode, matches)
+        debug('Batch {name}: {byellow}{target}{rst} done, {num} services', name=name, target=host.target, num=len(matches or ()))
+        if not host.future.done():
+            host.future.set_result({'returncode': returncode, 'name': host.tag[0], 'matches': matches})
+
+    async def _execute(self, cmd, plugin_name, module, name, hosts):
+        regex_pattern = RegexPatterns(get_compiled_patterns(module, 'portscan', plugin_name))
+        by_address = {host.target: host for host in hosts}
+        tag = ['portscan', plugin_name, name]
+        closing = []
+
+        info('Running {bgreen}{tool}{rst} against {byellow}{num}{rst} targets ({name})',
+             tool=plugin_name, num=len(hosts), name=name)
+        async with scan_slot(cmd, p_loader.plugin_cost(plugin_name), name, None):
+            log_command(self.basedir, tag, cmd)
+            start_time = time.time()
+            process = await asyncio.create_subprocess_shell(
+                    cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                    executable='/bin/bash'
+                )
+
+            current = None
+            async for lines in read_lines(process.stdout):
+                for line in lines:
+                    header = REPORT_HEADER.match(line)
+                    if header:
+                        if current is not None:
+                            closing.append(asyncio.create_task(self._close(current, 0, name)))
+                        current = by_address.pop(decode_line(header[1]), None) \
+                            or by_address.pop(decode_line(header[2] or b''), None)
+                        if current is not None:
+                            self._open(current, regex_pattern, cmd, name)
+                    elif current is not None and line.startswith(REPORT_END):
+                        closing.append(asyncio.create_task(self._close(current, 0, name)))
+                        current = None
+                    if current is not None:
+                        current.reader.feed_data(line + b'\n')
+                        current.lines.append(line)
+
+            await process.wait()
+            returncode = process.returncode
+
+        elapsed_time = calculate_elapsed_time(start_time)
+        if returncode != 0:
+            error('Batch {bred}{name}{rst} returned non-zero exit code: {returncode}', name=name, returncode=returncode)
+            log_error(self.basedir, tag, returncode)
+        else:
+            info('Batch {bblue}{name}{rst} of {num} targets finished successfully in {elapsed_time}',
+                 name=name, num=len(hosts), elapsed_time=elapsed_time)
+
+        if current is not None:
+            closing.append(asyncio.create_task(self._close(current, returncode, name)))
+        for host in by_address.values():
+            # Not in the scanner's output: down, filtered or never scanned
+            self._open(host, regex_pattern, cmd, name)
+            closing.append(asyncio.create_task(self._close(host, returncode, name)))
+        await asyncio.gather(*closing)
+
+
+_batcher = None
+
+
+def install_batcher(batcher: Optional[PortscanBatcher]) -> None:
+    """Route the batchable portscans of this process through batcher."""
+    global _batcher
+    _batcher = batcher
+
+
+def get_batcher() -> Optional[PortscanBatcher]:
+    return _batcher
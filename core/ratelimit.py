@@ -0,0 +1,108 @@
+"""Per-host and per-host:port pacing of tool launches, shared by every plugin."""
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+
+# Defaults of --host-delay, --port-delay and --port-concurrency, pacing is opt-in
+HOST_DELAY = 0.0
+PORT_DELAY = 0.0
+PORT_CONCURRENCY = 0
+# Expired reservations are dropped once there are this many (or twice as many as last time)
+PRUNE_MIN = 4096
+
+
+class HostRateLimiter:
+    """Space out launches against the same host and host:port.
+
+    A launch is claimed (claim()) only right before the tool starts, once the
+    caller holds its scan slots, so host_delay and port_delay are always the
+    minimum time between two launches. Callers wait for the turn first
+    (wait_turn()) without holding anything and claim again if another launch
+    took it while they were acquiring their slots, see core.config.scan_slot.
+    port_concurrency, when set, also caps the tools running against one
+    host:port at a time.
+    """
+    def __init__(self, host_delay=HOST_DELAY, port_delay=PORT_DELAY, port_concurrency=PORT_CONCURRENCY):
+        self.host_delay = host_delay
+        self.port_delay = port_delay
+        self.port_concurrency = port_concurrency
+        self._next = {}
+        self._prune_at = PRUNE_MIN
+        self._loop = None
+        self._port_slots = {}
+
+    def _keys(self, host, port):
+        keys = [(host, None, self.host_delay)]
+        if port is not None:
+            keys.append((host, port, self.port_delay))
+        return [key for key in keys if key[2]]
+
+    def _wait_time(self, host, port, now):
+        return max([0.0] + [self._next.get(key[:2], now) - now for key in self._keys(host, port)])
+
+    async def wait_turn(self, host, port=None) -> None:
+        """Sleep until a launch against host[:port] would be allowed."""
+        delay = self._wait_time(host, port, time.monotonic())
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._wait_time(host, port, time.monotonic())
+
+    def claim(self, host, port=None) -> bool:
+        """Take the launch turn of host[:port] now, False if it is not due yet."""
+        now = time.monotonic()
+        keys = self._keys(host, port)
+        if not keys:
+            return True
+        if self._wait_time(host, port, now) > 0:
+            return False
+        for h, p, delay in keys:
+            self._next[(h, p)] = now + delay
+        if len(self._next) > self._prune_at:
+            # A reservation in the past allows the same start as no reservation
+            self._next = {key: t for key, t in self._next.items() if t > now}
+            self._prune_at = max(PRUNE_MIN, 2 * len(self._next))
+        return True
+
+    def _slots(self, host, port):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pool workers run one event loop per target
+            self._loop = loop
+            self._port_slots = {}
+        slots = self._port_slots.get((host, port))
+        if slots is None:
+            slots = self._port_slots[(host, port)] = asyncio.Semaphore(self.port_concurrency)
+        return slots
+
+    @asynccontextmanager
+    async def concurrency(self, host, port=None):
+        """Hold one of the port_concurrency slots of host:port while the tool runs."""
+        if self.port_concurrency and port is not None:
+            async with self._slots(host, port):
+                yield
+        else:
+            yield
+
+
+def target_port(tag):
+    """Return (host, port) of a runcommand tag; scans carry 'Plugin:proto/port/service'."""
+    host = tag[-1] if len(tag) > 2 else None
+    _, _, service = tag[1].partition(':') if len(tag) > 1 else ('', '', '')
+    port = service.split('/')[1] if service.count('/') >= 2 else None
+    return host, port
+
+
+_limiter = None
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Return this process' limiter, configured from BIT00_HOST_DELAY/BIT00_PORT_DELAY/BIT00_PORT_CONCURRENCY."""
+    global _limiter
+    if _limiter is None:
+        _limiter = HostRateLimiter(
+            host_delay=float(os.getenv('BIT00_HOST_DELAY', HOST_DELAY)),
+            port_delay=float(os.getenv('BIT00_PORT_DELAY', PORT_DELAY)),
+            port_concurrency=int(os.getenv('BIT00_PORT_CONCURRENCY', PORT_CONCURRENCY)),
+        )
+    return _limiter
@@ -0,0 +1,90 @@
+"""Non-blocking hostname resolution with a shared cache."""
+import os
+import time
+import socket
+import asyncio
+from typing import Optional
+
+# Lookups running at once per event loop (BIT00_DNS_CONCURRENCY overrides it)
+RESOLVER_CONCURRENCY = int(os.getenv('BIT00_DNS_CONCURRENCY', '50'))
+# getaddrinfo does not expose record TTLs, answers are kept for fixed times
+POSITIVE_TTL = 300.0
+NEGATIVE_TTL = 60.0
+
+
+class Resolver:
+    """Resolve hostnames to an IPv4 address through loop.getaddrinfo.
+
+    Answers, including failures, are cached for their TTL and concurrent
+    lookups of the same name share a single query, so every plugin running
+    for a target reuses what the others already resolved.
+    """
+    def __init__(self, concurrency=RESOLVER_CONCURRENCY, ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = {}
+        self.stats = {'hits': 0, 'negative_hits': 0, 'lookups': 0, 'failures': 0}
+        self._loop = None
+        self._semaphore = None
+        self._inflight = {}
+
+    def _bind(self, loop):
+        # Pool workers run one event loop per target, asyncio primitives can't be shared
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._inflight = {}
+
+    async def resolve(self, hostname: str) -> Optional[str]:
+        """Return the IPv4 address of hostname, None if it does not resolve."""
+        cached = self.cache.get(hostname)
+        if cached is not None:
+            address, expires = cached
+            if expires > time.monotonic():
+                self.stats['hits' if address else 'negative_hits'] += 1
+                return address
+            del self.cache[hostname]
+
+        loop = asyncio.get_running_loop()
+        self._bind(loop)
+        future = self._inflight.get(hostname)
+        if future is not None:
+            self.stats['hits'] += 1
+            return await asyncio.shield(future)
+
+        future = loop.create_task(self._lookup(hostname))
+        self._inflight[hostname] = future
+        return await asyncio.shield(future)
+
+    async def _lookup(self, hostname):
+        async with self._semaphore:
+            self.stats['lookups'] += 1
+            try:
+                infos = await self._loop.getaddrinfo(hostname, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+                address = infos[0][4][0] if infos else None
+            except (OSError, UnicodeError):
+                address = None
+
+        if address is None:
+            self.stats['failures'] += 1
+        ttl = self.ttl if address else self.negative_ttl
+        self.cache[hostname] = (address, time.monotonic() + ttl)
+        self._inflight.pop(hostname, None)
+        return address
+
+    def hit_rate(self) -> float:
+        hits = self.stats['hits'] + self.stats['negative_hits']
+        total = hits + self.stats['lookups']
+        return hits / total if total else 0.0
+
+
+_resolver = None
+
+
+def get_resolver() -> Resolver:
+    """Return the resolver shared by every plugin of this process."""
+    global _resolver
+    if _resolver is None:
+        _resolver = Resolver()
+    return _resolver
@@ -0,0 +1,150 @@
+"""Content-addressed cache of tool output, replayed instead of re-running a command."""
+import os
+import re
+import json
+import time
+import base64
+import shutil
+import hashlib
+import asyncio
+from typing import Optional
+
+CACHE_DIR = '.cache'
+
+# Commands ending in "| tee <file>" also get <file> written back on replay
+_TEE_FILE = re.compile(r'\|\s*tee\s+(?:-a\s+)?(\S+)\s*$')
+
+
+class CachedResult:
+    def __init__(self, stdout: bytes, stderr: bytes, returncode: int, created: float):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+        self.created = created
+
+    def streams(self):
+        """Return StreamReaders replaying stdout and stderr for the pattern handlers."""
+        readers = []
+        for data in (self.stdout, self.stderr):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            readers.append(reader)
+        return readers
+
+
+class ResultCache:
+    """Tool output stored under <outputdir>/.cache/results, one file per key.
+
+    The key hashes the command, with the target's output directory replaced
+    by a placeholder so the same lookup made for another target hits, and a
+    fingerprint (path, size, mtime) of the tool binary so upgrading a tool
+    invalidates its entries. Only successful runs are stored.
+    """
+    def __init__(self, root: str):
+        self.root = os.path.join(root, 'results')
+        self._fingerprints = {}
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0}
+
+    def _fingerprint(self, cmd: str) -> str:
+        binary = cmd.split(None, 1)[0] if cmd.strip() else ''
+        fingerprint = self._fingerprints.get(binary)
+        if fingerprint is None:
+            path = shutil.which(binary)
+            try:
+                st = os.stat(path) if path else None
+            except OSError:
+                st = None
+            fingerprint = f"{os.path.realpath(path)}:{st.st_size}:{st.st_mtime_ns}" if st else binary
+            self._fingerprints[binary] = fingerprint
+        return fingerprint
+
+    def key(self, cmd: str, output: str) -> str:
+        normalized = ' '.join(cmd.replace(output, '{output}').split())
+        return hashlib.sha256(f"{self._fingerprint(cmd)}\0{normalized}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str, ttl: float) -> Optional[CachedResult]:
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.stats['misses'] += 1
+            return None
+
+        if time.time() - entry['created'] > ttl:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        return CachedResult(base64.b64decode(entry['stdout']), base64.b64decode(entry['stderr']),
+                            entry['returncode'], entry['created'])
+
+    def put(self, key: str, cmd: str, stdout: bytes, stderr: bytes, returncode: int) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'cmd': cmd,
+                'created': time.time(),
+                'returncode': returncode,
+                'stdout': base64.b64encode(stdout).decode('ascii'),
+                'stderr': base64.b64encode(stderr).decode('ascii'),
+            }, f)
+        os.replace(tmp_path, path)
+        self.stats['stores'] += 1
+
+
+def restore_tee_file(cmd: str, stdout: bytes) -> None:
+    """Write the file a "... | tee <file>" command would have produced."""
+    match = _TEE_FILE.search(cmd)
+    if not match:
+        return
+    path = match.group(1)
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(stdout)
+    except OSError:
+        pass
+
+
+async def capture_stream(stream, reader, chunks: list) -> None:
+    """Copy stream into reader for the pattern handlers, keeping the raw bytes in chunks.
+
+    reader is None when the output is only stored, not parsed.
+    """
+    while True:
+        data = await stream.read(65536)
+        if not data:
+            break
+        chunks.append(data)
+        if reader is not None:
+            reader.feed_data(data)
+    if reader is not None:
+        reader.feed_eof()
+
+
+_cache = None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the cache in BIT00_CACHE_DIR, None when caching is disabled (BIT00_CACHE=0)."""
+    global _cache
+    if os.getenv('BIT00_CACHE', '1') == '0':
+        return None
+    root = os.getenv('BIT00_CACHE_DIR', CACHE_DIR)
+    if _cache is None or _cache.root != os.path.join(root, 'results'):
+        _cache = ResultCache(root)
+    return _cache
+
+
+def cache_ttl(plugin_ttl) -> float:
+    """TTL of a plugin's results, --cache-ttl (BIT00_CACHE_TTL) overrides the plugin's cache_ttl."""
+    override = os.getenv('BIT00_CACHE_TTL')
+    if override is not None:
+        return float(override) if plugin_ttl else 0.0
+    return float(plugin_ttl or 0)
@@ -1,21 +1,85 @@
 """Run Commands with patterns."""
 import re
-import os
 import asyncio
-import socket
 import time
-from helpers.io import info, error, debug, e
+from helpers.io import info, error, debug, get_verbosity
 from helpers.utils import extract_fqdn, calculate_elapsed_time
 from colorama import Fore, Style
-from helpers.logger import log_command, log_error, log_pattern
-from loaders.patternsloaders import PatternsLoader
-
-from core.config import SEMAPHORE, LOCK, RUNNING_TASKS
+from helpers.logger import log_command, log_error, log_pattern, flush_logs
+from loaders.patternsloaders import CompiledPatterns, get_compiled_patterns
+from core.resolver import get_resolver
+from core.ratelimit import target_port
+from core.journal import get_journal, resume_enabled
+from core.resultcache import get_result_cache, cache_ttl, capture_stream, restore_tee_file
+from core.claims import get_claims
+from loaders.pluginsloaders import PluginLoader
+
+from core.config import LOCK, RUNNING_TASKS, scan_slot
+
+# More flexible regex that handles various Nmap output formats
+NMAP_SERVICE_LINE = re.compile(
+    r'^(?P<port>\d+)/(?P<protocol>tcp|udp)\s+'  # port/protocol
+    r'\S+\s+'  # state (open/filtered/closed)
+    r'(?P<service>[^\s]+)\s+'  # service name
+    r'(?:.*?\bttl\s+(?P<ttl>\d+|\?))?\s*'  # TTL capture (optional)
+    r'(?P<version>.*)$',  # version info
+    re.IGNORECASE
+)
+NMAP_REASON_PREFIX = re.compile(r'^\s*(?:syn-ack|ack|rst-ack)\s+', re.IGNORECASE)
+ARPA_IP_PREFIX = re.compile(r'^\d+\.\d+\.\d+\.\d+\.')
+
+p_loader = PluginLoader()
+
+# Bytes pulled from a tool's pipe per read
+READ_CHUNK = 256 * 1024
+
+
+async def read_lines(stream, chunk_size=READ_CHUNK):
+    """Yield the stripped, undecoded lines of stream, one list per chunk read.
+
+    Unlike readline() there is no per-line await and no line length limit.
+    """
+    pending = b''
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk if pending else chunk).split(b'\n')
+        pending = lines.pop()
+        yield [line.strip() for line in lines]
+    if pending:
+        yield [pending.strip()]
+
+
+def decode_line(line: bytes) -> str:
+    return str(line, 'utf8', errors='ignore')
 
 
 class RegexPatterns:
-    def __init__(self, patterns: list):
+    def __init__(self, patterns):
+        if not isinstance(patterns, CompiledPatterns):
+            patterns = CompiledPatterns(patterns)
         self.patterns = patterns
+        self.verbose_level = get_verbosity()
+
+    async def matched_lines(self, stream, tag, color):
+        """Yield the decoded lines of stream that may match a pattern.
+
+        Lines are filtered on their raw bytes and only decoded when they pass,
+        with -vv every line is still decoded to be echoed.
+        """
+        echo = self.verbose_level > 1
+        prefix = color + '[' + Style.BRIGHT + (':'.join(tag[-2:])) + Style.NORMAL + '] ' + Fore.RESET + '{line}'
+        may_match = self.patterns.may_match
+        may_match_any = self.patterns.may_match_any
+        async for lines in read_lines(stream):
+            if not echo and not may_match_any(lines):
+                continue
+            for raw in lines:
+                if echo:
+                    debug(prefix, color=color, line=decode_line(raw))
+                if may_match(raw):
+                    yield decode_line(raw)
      
     def normalize_matches(match):
         _tmp = re.search(r'(?P<domain>[\w.-]+)\s+-\s+Found open ports:\s+(?P<ports>[\d,\s]+)', match)
@@ -29,17 +93,6 @@ class RegexPatterns:
     
     async def parse_service_line(self, line: str):
         """Parse Nmap service detection line"""
-   
-        # More flexible regex that handles various Nmap output formats
-        NMAP_SERVICE_LINE = re.compile(
-            r'^(?P<port>\d+)/(?P<protocol>tcp|udp)\s+'  # port/protocol
-            r'\S+\s+'  # state (open/filtered/closed)
-            r'(?P<service>[^\s]+)\s+'  # service name
-            r'(?:.*?\bttl\s+(?P<ttl>\d+|\?))?\s*'  # TTL capture (optional)
-            r'(?P<version>.*)$',  # version info
-            re.IGNORECASE
-        )
-    
         m = NMAP_SERVICE_LINE.search(line)
         if not m:
             return None
@@ -50,7 +103,7 @@ class RegexPatterns:
         version = m.group('version').strip()
     
         # Additional cleanup for version field
-        version = re.sub(r'^\s*(?:syn-ack|ack|rst-ack)\s+', '', version, flags=re.IGNORECASE).strip()
+        version = NMAP_REASON_PREFIX.sub('', version).strip()
         
         return port, service, version, ttl
     
@@ -75,41 +128,31 @@ class RegexPatterns:
             return await self.default_pattern(stream, output, tag, color)
         
 
+    def _add_discovered(self, matches, output, tag, _ip, _xydomain):
+        # ensure we store a list of names per IP
+        if _ip not in matches:
+            matches[_ip] = [_xydomain]
+            log_pattern(output, tag, "domain2ip", f"{_ip} => {_xydomain}")
+        elif _xydomain not in matches[_ip]:
+            matches[_ip].append(_xydomain)
+            log_pattern(output, tag, "domain2ip", f"{_ip} => {_xydomain}")
+
+    async def _resolve_discovered(self, resolver, matches, output, tag, _xydomain):
+        _ip = await resolver.resolve(_xydomain)
+        if not _ip:
+            error(f"{_xydomain} does not appear to be a resolvable hostname.")
+            return
+        self._add_discovered(matches, output, tag, _ip, _xydomain)
+
     async def discover_pattern(self, stream, output, tag='?', color=Fore.BLUE):
         matches = {}
         basedomain = tag[2]
-        while True:
-            line = await stream.readline()
-
-            if not line:
-                break
-
-            # normalize bytes -> str
-            try:
-                line = str(line.strip(), 'utf8', errors='ignore')
-            except UnicodeDecodeError:
-                # fallback to default repr
-                line = repr(line)
-            
-            verbose_level = int(os.getenv('SCANNER_VERBOSE', '0'))
-            if verbose_level > 1:
-                debug(color + '[' + Style.BRIGHT + (':'.join(tag[-2:])) + Style.NORMAL + '] ' + Fore.RESET + '{line}', color=color, line=line)
-
-            for p in self.patterns:
-                # pattern entries may be dicts with 'pattern' key
-                pat = p.get('pattern') if isinstance(p, dict) else None
-                if not pat:
-                    continue
-
-                try:
-                    parse_match = re.search(pat, line)
-                except re.error:
-                    # invalid regex; skip
-                    continue
-                
-                if not parse_match:
-                    continue
-
+        # Names without an address are resolved in the background so reading goes on
+        resolver = get_resolver()
+        lookups = []
+        queued = set()
+        async for line in self.matched_lines(stream, tag, color):
+            for p, parse_match in self.patterns.search(line):
                 domain_group = None
                 ip_group = None
                 try:
@@ -132,72 +175,40 @@ class RegexPatterns:
                 if 'arpa' in _xydomain:
                     continue
 
-                if re.match(r'^\d+\.\d+\.\d+\.\d+\.', _xydomain):
+                if ARPA_IP_PREFIX.match(_xydomain):
                     continue
 
                 if basedomain and not _xydomain.endswith(basedomain):
                     continue
 
                 if not _ip:
-                    try:
-                        _ip = socket.gethostbyname(_xydomain)
-                    except socket.gaierror:
-                        error(f"{_xydomain} does not appear to be a resolvable hostname.")
-                        continue
-
-                # ensure we store a list of names per IP
-                async with LOCK:
-                    if _ip not in matches:
-                        matches[_ip] = [_xydomain]
-                        log_pattern(output, tag, "domain2ip", f"{_ip} => {_xydomain}")
-                    elif _xydomain not in matches[_ip]:
-                        matches[_ip].append(_xydomain)
-                        log_pattern(output, tag, "domain2ip", f"{_ip} => {_xydomain}")
+                    if _xydomain not in queued:
+                        queued.add(_xydomain)
+                        lookups.append(asyncio.create_task(
+                            self._resolve_discovered(resolver, matches, output, tag, _xydomain)))
+                    continue
+
+                self._add_discovered(matches, output, tag, _ip, _xydomain)
+        
+        if lookups:
+            await asyncio.gather(*lookups)
+            debug("Resolved {num} names for {tool}, resolver cache hit rate {rate:.0%} ({lookups} lookups)",
+                  num=len(lookups), tool=tag[1], rate=resolver.hit_rate(), lookups=resolver.stats['lookups'])
         
         return matches
     
     async def portscan_pattern(self, stream, output, tag='?', color=Fore.BLUE):
         matches = []
 
-        while True:
-            line = await stream.readline()
-
-            if not line:
-                break
-
-            # normalize bytes -> str
-            try:
-                line = str(line.strip(), 'utf8', errors='ignore')
-            except Exception:
-                # fallback to default repr
-                line = repr(line)
-            
-            verbose_level = int(os.getenv('SCANNER_VERBOSE', '0'))
-            if verbose_level > 1:
-                debug(color + '[' + Style.BRIGHT + (':'.join(tag[-2:])) + Style.NORMAL + '] ' + Fore.RESET + '{line}', color=color, line=line)
-            
-            for p in self.patterns:
-                pat = p.get('pattern') if isinstance(p, dict) else None
-                
-                if not pat:
-                    continue
-
-                try:
-                    parse_match = re.search(pat, line)
-                except re.error:
-                    # invalid regex; skip
-                    continue
-                
-                if not parse_match:
-                    continue
-                
+        async for line in self.matched_lines(stream, tag, color):
+            for p, parse_match in self.patterns.search(line):
                 try:
                     proto = parse_match.group('protocol') if 'protocol' in parse_match.re.groupindex else None
                     port = parse_match.group('port') if 'port' in parse_match.re.groupindex else None
                     service = parse_match.group('service') if 'service' in parse_match.re.groupindex else None
                     version = parse_match.group('version') if 'version' in parse_match.re.groupindex else None
                 except Exception:
-                    debug(f"Not pattern matches.!!!")
+                    debug("Not pattern matches.!!!")
                     continue
 
                 if not proto:
@@ -206,78 +217,60 @@ class RegexPatterns:
                 #print(proto, port,service,version)
                 _match = await self.parse_service_line(line)
                 
-                async with LOCK:
-                    if _match:
-                        port, _service, _version, _ttl = _match
-                        #print(f"[===] {proto}/{port}/{_service} => ({_ttl}) {_version}")
-
-                        if not _version and _ttl:
-                            #print(f"[===] Only ttl {proto}/{port}/{_service} => ({_ttl})")
-                            srv = (proto, port, _service, None, _ttl)
-                            log_pattern(output, tag, f"{proto}/{port}/{_service}", f" => ({_ttl})")
+                if _match:
+                    port, _service, _version, _ttl = _match
+                    #print(f"[===] {proto}/{port}/{_service} => ({_ttl}) {_version}")
+
+                    if not _version and _ttl:
+                        #print(f"[===] Only ttl {proto}/{port}/{_service} => ({_ttl})")
+                        srv = (proto, port, _service, None, _ttl)
+                        log_pattern(output, tag, f"{proto}/{port}/{_service}", f" => ({_ttl})")
                         
-                        if not _ttl and _version:
-                            #print(f"[===] Only version {proto}/{port}/{_service} => {_version}")
-                            srv = (proto, port, _service, _version, None)
-                            log_pattern(output, tag, f"{proto}/{port}/{_service}", f" => {_version}")
+                    if not _ttl and _version:
+                        #print(f"[===] Only version {proto}/{port}/{_service} => {_version}")
+                        srv = (proto, port, _service, _version, None)
+                        log_pattern(output, tag, f"{proto}/{port}/{_service}", f" => {_version}")
                         
-                        if not _ttl and not _version:
-                            #print(f"[===] Nothing {proto}/{port}/{_service}")
-                            srv = (proto, port, _service, None, None)
-                            log_pattern(output, tag, f"{proto}/{port}/{_service}", f"")
+                    if not _ttl and not _version:
+                        #print(f"[===] Nothing {proto}/{port}/{_service}")
+                        srv = (proto, port, _service, None, None)
+                        log_pattern(output, tag, f"{proto}/{port}/{_service}", f"")
                         
-                        srv = (proto, port, _service, _version, _ttl)
-                        log_pattern(output, tag, f"{proto}/{port}/{_service}", f" => ({_ttl}) {_version}")
+                    srv = (proto, port, _service, _version, _ttl)
+                    log_pattern(output, tag, f"{proto}/{port}/{_service}", f" => ({_ttl}) {_version}")
                 
                 if srv not in matches:
                     matches.append(srv)
             
         return matches
     
+    async def sweep_pattern(self, stream, output, tag='?', color=Fore.BLUE):
+        """Collect the addresses a host discovery scan reported as up."""
+        alive = []
+        seen = set()
+        async for line in self.matched_lines(stream, tag, color):
+            for p, match in self.patterns.search(line):
+                ip = match.group('ipaddress') if 'ipaddress' in match.re.groupindex else None
+                if ip and ip not in seen:
+                    seen.add(ip)
+                    alive.append(ip)
+                    log_pattern(output, tag, "alive", ip)
+        return alive
+
     async def default_pattern(self, stream, output, tag='?', color=Fore.BLUE):
-        while True:
-            line = await stream.readline()
-
-            if not line:
-                break
-
-            # normalize bytes -> str
-            try:
-                line = str(line.strip(), 'utf8', errors='ignore')
-            except Exception:
-                # fallback to default repr
-                line = repr(line)
-            
-            verbose_level = int(os.getenv('SCANNER_VERBOSE', '0'))
-            if verbose_level > 1:
-                debug(color + '[' + Style.BRIGHT + (':'.join(tag[-2:])) + Style.NORMAL + '] ' + Fore.RESET + '{line}', color=color, line=line)
-
-            for p in self.patterns:
-                # pattern entries may be dicts with 'pattern' key
-                pat = p.get('pattern') if isinstance(p, dict) else None
-                desc = p.get('description') if isinstance(p, dict) else None
-                if not pat:
-                    continue
-                try:
-                    match = re.search(pat, line)
-                except re.error:
-                    # invalid regex; skip
-                    continue
+        async for line in self.matched_lines(stream, tag, color):
+            for p, match in self.patterns.search(line):
+                desc = p.get('description')
                 
-                if not match:
-                    continue
-                
-                
-                async with LOCK:
-                    if "SublisterPorts" in tag:
-                        domain, ports = self.normalize_matches(match)
-                        info("Found pattern: {bgreen}{tool}:{target}:{rst}"+ "{bmagenta}" + desc.replace('{_match}') + "{rst}",
-                             tool=tag[1], target=domain, _match=ports)
-                        log_pattern(output, tag, desc.split(':')[0].strip(), ports)
+                if "SublisterPorts" in tag:
+                    domain, ports = self.normalize_matches(match)
+                    info("Found pattern: {bgreen}{tool}:{target}:{rst}"+ "{bmagenta}" + desc.replace('{_match}') + "{rst}",
+                         tool=tag[1], target=domain, _match=ports)
+                    log_pattern(output, tag, desc.split(':')[0].strip(), ports)
                     
-                    info("Found pattern: {bgreen}{tool}:{target}:{rst}{bmagenta}{desc}:{_match}{rst}", 
-                         tool=tag[1], target=tag[2], desc=desc.split(':')[0].strip() , _match=match.group().strip('"'))
-                    log_pattern(output, tag, desc.split(':')[0].strip(), match.group().strip('"'))
+                info("Found pattern: {bgreen}{tool}:{target}:{rst}{bmagenta}{desc}:{_match}{rst}", 
+                     tool=tag[1], target=tag[2], desc=desc.split(':')[0].strip() , _match=match.group().strip('"'))
+                log_pattern(output, tag, desc.split(':')[0].strip(), match.group().strip('"'))
                 
                 
                
@@ -288,9 +281,37 @@ class RegexPatterns:
                     
 
 
+async def _replay(regex_pattern, cached, cmd, tag, output, journal, source):
+    """Feed stored output through the pattern handlers instead of running cmd."""
+    log_command(output, tag, f"{cmd} ({source})")
+    journal.started(tag, str(cmd))
+    restore_tee_file(str(cmd), cached.stdout)
+    resp = None
+    if regex_pattern is not None:
+        stdout, stderr = cached.streams()
+        resp, errors = await asyncio.gather(
+            regex_pattern.read_stream(stdout, output=output, tag=tag),
+            regex_pattern.read_stream(stderr, output=output, tag=tag, color=Fore.RED)
+        )
+    info('Task {bblue}{tool}{rst} on {byellow}{target}{rst} replayed from the {source}',
+             tool=tag[1], target=tag[2], source=source)
+
+    await asyncio.to_thread(flush_logs)
+    journal.finished(tag, cached.returncode, resp)
+    return {'returncode': cached.returncode, 'name': tag[0], 'matches': resp}
+
+
 async def runcommand(cmd, tag, output, module):
     """Generic command runner with pattern matching"""
     tool = None
+    journal = get_journal(output)
+    if resume_enabled():
+        previous = journal.completed(tag)
+        if previous is not None:
+            info('Skipping {bgreen}{tool}{rst} against {byellow}{target}{rst}, finished in a previous run',
+                 tool=tag[1], target=tag[2])
+            return previous
+
     info('Running {bgreen}{tool}{rst} against: {byellow}{target}{rst}',
         tool=tag[1], target=tag[2])
     
@@ -298,26 +319,72 @@ async def runcommand(cmd, tag, output, module):
         
     # Config Patterns
     if not module:
-        error("No module asigned to the execute the command. {tag}")
+        error("No module asigned to the execute the command. {tag}", tag=tag)
     
     if tag[0] == 'scans' and module == 'netscan':
         tool = tag[1].split(':')[0]
     else:
         tool = tag[1]
     
-    p_patterns = PatternsLoader(module)
-    patterns = p_patterns.get_patterns_by_name(tag[0], tool)
-    regex_pattern = RegexPatterns(patterns)
-
-
-    async with SEMAPHORE:
+    plugin_name = tag[1].split(':')[0]
+    # Tools declaring parse_output = False only need their output in their tee file
+    regex_pattern = None
+    if p_loader.plugin_setting(plugin_name, 'parse_output', True):
+        regex_pattern = RegexPatterns(get_compiled_patterns(module, tag[0], tool))
+    cost = p_loader.plugin_cost(plugin_name)
+    host, port = target_port(tag)
+
+    # Plugins opt in to the result cache with a cache_ttl
+    ttl = cache_ttl(p_loader.plugin_setting(plugin_name, 'cache_ttl', 0))
+    cache = get_result_cache() if ttl else None
+    cache_key = cache.key(str(cmd), output) if cache else None
+    cached = cache.get(cache_key, ttl) if cache else None
+
+    if cached is not None:
+        return await _replay(regex_pattern, cached, cmd, tag, output, journal, "result cache")
+
+    # IP-level OSINT work is claimed once per run and shared with the other targets
+    claims = get_claims() if module == 'osint' and tag[0] == 'ipnet' else None
+    claim_key = None
+    if claims is not None:
+        key = claims.store.key(str(cmd), output)
+        try:
+            while not claims.claim(key):
+                shared = await claims.wait(key)
+                if shared is not None:
+                    return await _replay(regex_pattern, shared, cmd, tag, output, journal, "run's shared results")
+            claim_key = key
+        except TimeoutError as e:
+            error(f"{e}, running {tag[1]} anyway")
+
+    # Where the output is stored once the command succeeded
+    stores = [(cache, cache_key)] if cache else []
+    if claim_key:
+        stores.append((claims.store, claim_key))
+
+    try:
+        result = await _run_process(cmd, tag, output, regex_pattern, journal, cost, host, port, stores)
+    except BaseException:
+        if claim_key:
+            claims.failed(claim_key)
+        raise
+    if claim_key and result['returncode'] != 0:
+        claims.failed(claim_key)
+    return result
+
+
+async def _run_process(cmd, tag, output, regex_pattern, journal, cost, host, port, stores):
+    async with scan_slot(str(cmd), cost, host, port):
         
         log_command(output, tag, str(cmd))
+        journal.started(tag, str(cmd))
         start_time = time.time()
+        # Output nobody reads goes straight to /dev/null
+        pipe = asyncio.subprocess.PIPE if regex_pattern is not None or stores else asyncio.subprocess.DEVNULL
         process = await asyncio.create_subprocess_shell(
                 cmd, 
-                stdout=asyncio.subprocess.PIPE, 
-                stderr=asyncio.subprocess.PIPE, 
+                stdout=pipe, 
+                stderr=pipe, 
                 executable='/bin/bash'
             )
             
@@ -326,18 +393,31 @@ async def runcommand(cmd, tag, output, module):
 
             #return process.stdout, process.stderr
 
+        stdout, stderr = process.stdout, process.stderr
+        captured = None
+        if stores:
+            # Keep the raw output to store it once the command succeeded
+            captured = ([], [])
+            stdout, stderr = (asyncio.StreamReader(), asyncio.StreamReader()) if regex_pattern is not None else (None, None)
+            copies = [asyncio.create_task(capture_stream(process.stdout, stdout, captured[0])),
+                      asyncio.create_task(capture_stream(process.stderr, stderr, captured[1]))]
+
+        resp = None
+        if regex_pattern is not None:
             # Use callback for specialized parsing or default pattern matching
-        _output = [
-            regex_pattern.read_stream(process.stdout, output=output, tag=tag),
-            regex_pattern.read_stream(process.stderr, output=output, tag=tag, color=Fore.RED)
-        ]
+            _output = [
+                regex_pattern.read_stream(stdout, output=output, tag=tag),
+                regex_pattern.read_stream(stderr, output=output, tag=tag, color=Fore.RED)
+            ]
             
-        #results = await self.dopattern(process, stage=stage)
-        _tmp = await asyncio.gather(*_output)
-        resp = _tmp[0]
-        errors = _tmp[1]
+            #results = await self.dopattern(process, stage=stage)
+            _tmp = await asyncio.gather(*_output)
+            resp = _tmp[0]
+            errors = _tmp[1]
 
         await process.wait()
+        if captured:
+            await asyncio.gather(*copies)
 
         async with LOCK:
             if tag in RUNNING_TASKS:
@@ -349,10 +429,17 @@ async def runcommand(cmd, tag, output, module):
         if returncode != 0:
             error('Task {bred}{tag}{rst} on {byellow}{target}{rst} returned non-zero exit code: {returncode}',
                       tag=tag, target=tag[2], returncode=returncode)
-            async with LOCK:
-                log_error(output, tag, returncode)
+            log_error(output, tag, returncode)
         else:
             info('Task {bblue}{tool}{rst} on {byellow}{target}{rst} finished successfully in {elapsed_time}',
                      tool=tag[1], target=tag[2], elapsed_time=elapsed_time)
+            if captured:
+                stdout, stderr = b''.join(captured[0]), b''.join(captured[1])
+                for store, key in stores:
+                    store.put(key, str(cmd), stdout, stderr, returncode)
+
+        # Findings must be written before the journal marks the task as done
+        await asyncio.to_thread(flush_logs)
+        journal.finished(tag, returncode, resp)
 
         return {'returncode': returncode, 'name': tag[0], 'matches': resp}
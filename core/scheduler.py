@@ -0,0 +1,110 @@
+"""Drive many targets as coroutines of a single event loop."""
+import asyncio
+from concurrent.futures import FIRST_COMPLETED
+
+from helpers.io import error
+from helpers.logger import flush_logs
+from helpers.utils import aiter_targets, is_valid_ip
+from core import config
+from core.config import TARGET_SLOTS, TARGET_USAGE, TARGET_ADMISSION
+from core.slots import WeightedSemaphore
+from core.portbatch import get_batcher
+
+
+class _Admission:
+    """A target's place among the concurrent_targets running their own scans."""
+    def __init__(self, active: asyncio.Semaphore):
+        self.active = active
+        self.waiter = None
+
+    @property
+    def admitted(self) -> bool:
+        return self.waiter is not None and self.waiter.done() and not self.waiter.cancelled()
+
+    async def __call__(self):
+        # Every batched portscan of the target asks, the first one waits
+        if self.waiter is None:
+            self.waiter = asyncio.ensure_future(self._enter())
+        await asyncio.shield(self.waiter)
+
+    async def _enter(self):
+        await self.active.acquire()
+        if config.BUDGET is not None:
+            config.BUDGET.enter_target()
+
+    def release(self):
+        if self.waiter is None:
+            return
+        if not self.waiter.done():
+            self.waiter.cancel()
+        elif not self.waiter.cancelled() and self.waiter.exception() is None:
+            if config.BUDGET is not None:
+                config.BUDGET.leave_target()
+            self.active.release()
+
+
+class TargetScheduler:
+    """Run targets concurrently in the current event loop.
+
+    Every target gets its own module instance and its own pool of
+    concurrent_scans weighted scan slots; the installed ProcessBudget caps the
+    subprocesses of all targets together. Targets are pulled from the
+    iterator as others finish, so at most concurrent_targets are in progress.
+
+    With a PortscanBatcher installed, IP targets are started up to two
+    batches ahead of that window: they wait for their batched portscan
+    without counting against concurrent_targets, and take their place in it
+    when their block of the scanner's output is demultiplexed.
+    """
+    def __init__(self, module_class, args):
+        self.module_class = module_class
+        self.args = args
+        self.concurrent_targets = args.concurrent_targets
+        self.concurrent_scans = args.concurrent_scans
+        self.batcher = get_batcher()
+        self.active = None
+
+    async def run_target(self, target):
+        # Tasks created by the module inherit these through their context
+        TARGET_SLOTS.set(WeightedSemaphore(self.concurrent_scans))
+        TARGET_USAGE.set([0])
+        admission = _Admission(self.active)
+        TARGET_ADMISSION.set(admission)
+        try:
+            if self.batcher is None or not is_valid_ip(target):
+                await admission()
+            instance = self.module_class()
+            return await instance.execute(target, self.args)
+        finally:
+            admission.release()
+            flush_logs(wait=False)
+
+    async def run(self, targets) -> int:
+        """Run every target, returns how many were started."""
+        self.active = asyncio.Semaphore(self.concurrent_targets)
+        window = self.concurrent_targets
+        if self.batcher is not None:
+            # One batch being scanned and the next one filling up
+            window += 2 * self.batcher.batch_size
+        pending = set()
+        started = 0
+        async for target in aiter_targets(targets):
+            pending.add(asyncio.create_task(self.run_target(target)))
+            started += 1
+            if len(pending) >= window:
+                done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+                self._collect_results(done)
+
+        if self.batcher is not None:
+            self.batcher.close()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+            self._collect_results(done)
+        return started
+
+    def _collect_results(self, tasks):
+        for task in tasks:
+            try:
+                task.result()
+            except Exception as e:
+                error(f"Error processing target: {e}")
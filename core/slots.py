@@ -0,0 +1,81 @@
+"""Weighted scan slots: plugins declare a cost, cheap ones are admitted first."""
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+
+# A waiter older than this is served next, even if cheaper ones keep arriving
+STARVATION_TIMEOUT = 30.0
+
+
+class WeightedSemaphore:
+    """Semaphore whose acquirers take cost units out of capacity.
+
+    Waiters are admitted cheapest first (FIFO among equal costs) while they
+    fit, so quick lookups are not stuck behind a full port scan. A cost above
+    capacity is clamped, such a task simply runs alone. Once the oldest waiter
+    has waited STARVATION_TIMEOUT, nothing else is admitted before it.
+    """
+    def __init__(self, capacity: int, starvation_timeout: float = STARVATION_TIMEOUT):
+        self.capacity = capacity
+        self.starvation_timeout = starvation_timeout
+        self.used = 0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def weight(self, cost) -> int:
+        return max(1, min(int(cost or 1), self.capacity))
+
+    async def acquire(self, cost=1) -> int:
+        """Wait until cost units are free, returns the units taken."""
+        weight = self.weight(cost)
+        future = asyncio.get_running_loop().create_future()
+        entry = (weight, next(self._seq), time.monotonic(), future)
+        heapq.heappush(self._waiters, entry)
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted and cancelled at the same time
+                self.release(weight)
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._wake()
+            raise
+        return weight
+
+    def release(self, weight: int) -> None:
+        self.used -= weight
+        self._wake()
+
+    def _next_waiter(self):
+        oldest = min(self._waiters, key=lambda entry: entry[1])
+        if time.monotonic() - oldest[2] >= self.starvation_timeout:
+            return oldest
+        return self._waiters[0]
+
+    def _wake(self):
+        while self._waiters:
+            entry = self._next_waiter()
+            weight, _, _, future = entry
+            if future.done():
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                continue
+            if self.used + weight > self.capacity:
+                return
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self.used += weight
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, cost=1):
+        weight = await self.acquire(cost)
+        try:
+            yield weight
+        finally:
+            self.release(weight)
@@ -0,0 +1,100 @@
+"""Host discovery sweep over the whole scope before the per-target fan-out."""
+import os
+import asyncio
+import hashlib
+from collections import deque
+from ipaddress import ip_address
+
+from helpers.io import info, warn
+from loaders.pluginsloaders import PluginLoader
+
+SWEEP_PLUGIN = 'NmapHostSweep'
+SWEEP_DIR = '.sweep'
+# Addresses probed by one nmap run
+SWEEP_BATCH = 4096
+
+
+def _sweepable(target: str) -> bool:
+    """Only IPv4 addresses are probed, names and IPv6 targets go straight to the scan."""
+    try:
+        return ip_address(target).version == 4
+    except ValueError:
+        return False
+
+
+class HostSweep:
+    """Keep the targets answering a ping scan, in their original order.
+
+    IPv4 targets are written in batches of batch_size to
+    <output>/.sweep/scans/batch-N.txt and each batch is probed by one
+    NmapHostSweep run (nmap -sn -iL). At most window batches are in flight,
+    so the scope is never held in memory at once, and the live targets of a
+    batch are yielded as soon as it and the batches before it are done. A
+    batch whose sweep fails keeps all of its addresses.
+    """
+    def __init__(self, args, batch_size: int = SWEEP_BATCH, window: int = None):
+        self.basedir = os.path.abspath(os.path.join(args.outputdir, SWEEP_DIR))
+        self.batch_size = batch_size
+        self.window = window or args.concurrent_targets
+        self.plugin = PluginLoader().get_plugin(SWEEP_PLUGIN)
+        self.stats = {'probed': 0, 'alive': 0}
+
+    def _batches(self, targets):
+        batch = []
+        for target in targets:
+            batch.append(target)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _probe(self, index: int, batch: list) -> list:
+        addresses = [target for target in batch if _sweepable(target)]
+        if not addresses:
+            return batch
+
+        path = os.path.join(self.basedir, 'scans', f"batch-{index}.txt")
+        with open(path, 'w') as f:
+            f.write('\n'.join(addresses) + '\n')
+
+        plugin = PluginLoader().load_plugin(self.plugin['path'])
+        # --resume replays a batch only if it holds the same addresses, whatever the
+        # scope, --exclude or --sweep-batch of the previous run
+        digest = hashlib.blake2b('\n'.join(addresses).encode(), digest_size=8).hexdigest()
+        tag = list(self.plugin['tag']) + [f"batch-{index}-{digest}"]
+        result = await plugin.run(target=path, tag=tag, output=self.basedir, module='netscan')
+        if not isinstance(result, dict) or result.get('returncode') != 0:
+            warn("Host sweep of batch {index} failed, scanning its {num} addresses anyway", index=index, num=len(addresses))
+            return batch
+
+        alive = set(result.get('matches') or ())
+        self.stats['probed'] += len(addresses)
+        self.stats['alive'] += len(alive)
+        return [target for target in batch if target in alive or not _sweepable(target)]
+
+    async def run(self, targets):
+        """Yield the targets worth a port scan, batch by batch."""
+        if self.plugin is None:
+            warn("Plugin {plugin} not found, skipping the host sweep", plugin=SWEEP_PLUGIN)
+            for target in targets:
+                yield target
+            return
+        os.makedirs(os.path.join(self.basedir, 'scans'), exist_ok=True)
+
+        pending = deque()
+        try:
+            for index, batch in enumerate(self._batches(targets)):
+                pending.append(asyncio.create_task(self._probe(index, batch)))
+                if len(pending) >= self.window:
+                    for target in await pending.popleft():
+                        yield target
+            while pending:
+                for target in await pending.popleft():
+                    yield target
+        finally:
+            for task in pending:
+                task.cancel()
+
+        info("Host sweep found {bgreen}{alive}{rst} live hosts out of {probed} addresses",
+             alive=self.stats['alive'], probed=self.stats['probed'])
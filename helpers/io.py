@@ -1,6 +1,7 @@
 import sys
 import string
 import os
+from functools import lru_cache
 from colorama import Fore, Style
 
 
@@ -8,58 +9,91 @@ from colorama import Fore, Style
 # COLOR FUNCTIONS
 # =============================================================================
 
-def e(*args, frame_index=1, **kvargs):
-    frame = sys._getframe(frame_index)
-    vals = {}
-    vals.update(frame.f_globals)
-    vals.update(frame.f_locals)
-    vals.update(kvargs)
-    return string.Formatter().vformat(' '.join(args), args, vals)
-
-def cprint(*args, color=Fore.RESET, char='*', sep=' ', end='\n', frame_index=1, file=sys.stdout, **kvargs):
-    frame = sys._getframe(frame_index)
-    vals = {
-        'bgreen':  Fore.GREEN  + Style.BRIGHT, 'bred':    Fore.RED    + Style.BRIGHT,
-        'bblue':   Fore.BLUE   + Style.BRIGHT, 'byellow': Fore.YELLOW + Style.BRIGHT,
-        'bmagenta': Fore.MAGENTA + Style.BRIGHT, 'green':  Fore.GREEN, 'red':    Fore.RED,
-        'blue':   Fore.BLUE, 'yellow': Fore.YELLOW, 'magenta': Fore.MAGENTA,
-        'bright': Style.BRIGHT, 'srst':   Style.NORMAL, 'crst':   Fore.RESET,
-        'rst':    Style.NORMAL + Fore.RESET
-        }
-    vals.update(frame.f_globals)
-    vals.update(frame.f_locals)
-    vals.update(kvargs)
-
-    unfmt = ''
-    if char is not None:
-        unfmt += color + '[' + Style.BRIGHT + char + Style.NORMAL + ']' + Fore.RESET + sep
-    unfmt += sep.join(args)
-
-    fmted = unfmt
-    for attempt in range(10):
+COLORS = {
+    'bgreen':  Fore.GREEN  + Style.BRIGHT, 'bred':    Fore.RED    + Style.BRIGHT,
+    'bblue':   Fore.BLUE   + Style.BRIGHT, 'byellow': Fore.YELLOW + Style.BRIGHT,
+    'bmagenta': Fore.MAGENTA + Style.BRIGHT, 'green':  Fore.GREEN, 'red':    Fore.RED,
+    'blue':   Fore.BLUE, 'yellow': Fore.YELLOW, 'magenta': Fore.MAGENTA,
+    'bright': Style.BRIGHT, 'srst':   Style.NORMAL, 'crst':   Fore.RESET,
+    'rst':    Style.NORMAL + Fore.RESET
+    }
+
+_FORMATTER = string.Formatter()
+
+# -v level, read once; the CLI updates it through set_verbosity()
+_verbosity = int(os.getenv('SCANNER_VERBOSE', '0') or 0)
+
+
+def set_verbosity(level) -> None:
+    """Set the active level, exported as SCANNER_VERBOSE for the worker processes."""
+    global _verbosity
+    _verbosity = int(level or 0)
+    os.environ['SCANNER_VERBOSE'] = str(_verbosity)
+
+
+def get_verbosity() -> int:
+    return _verbosity
+
+
+@lru_cache(maxsize=None)
+def _prefix(color, char, sep):
+    if char is None:
+        return ''
+    return color + '[' + Style.BRIGHT + char + Style.NORMAL + ']' + Fore.RESET + sep
+
+
+@lru_cache(maxsize=4096)
+def _template(fmt):
+    """Parse fmt once into (literal, field, spec, conversion) chunks."""
+    try:
+        return tuple(_FORMATTER.parse(fmt))
+    except ValueError:
+        # Unbalanced braces (e.g. from tool output), print as is
+        return ((fmt, None, None, None),)
+
+
+def _render(fmt, args, vals):
+    chunks = _template(fmt)
+    if len(chunks) == 1 and chunks[0][1] is None:
+        return chunks[0][0]
+
+    out = []
+    for literal, field, spec, conversion in chunks:
+        out.append(literal)
+        if field is None:
+            continue
         try:
-            fmted = string.Formatter().vformat(unfmt, args, vals)
-            break
-        except KeyError as err:
-            key = err.args[0]
-            unfmt = unfmt.replace('{' + key + '}', '{{' + key + '}}')
+            value, _ = _FORMATTER.get_field(field, args, vals)
+            value = _FORMATTER.convert_field(value, conversion)
+            out.append(format(value, _render(spec, args, vals) if spec else ''))
+        except (KeyError, IndexError, AttributeError, TypeError, ValueError):
+            # Unknown fields are kept literally
+            out.append('{' + field + ('!' + conversion if conversion else '') + (':' + spec if spec else '') + '}')
+    return ''.join(out)
+
+
+def e(*args, **kvargs):
+    return _render(' '.join(args), args, kvargs)
 
+def cprint(*args, color=Fore.RESET, char='*', sep=' ', end='\n', file=sys.stdout, **kvargs):
+    vals = dict(COLORS, **kvargs) if kvargs else COLORS
+    fmted = _render(_prefix(color, char, sep) + sep.join(args), args, vals)
     print(fmted, sep=sep, end=end, file=file)
 
 def debug(*args, color=Fore.BLUE, sep=' ', end='\n', file=sys.stdout, **kvargs):
-    verbose_level = int(os.getenv('SCANNER_VERBOSE', '0'))
-    if verbose_level >= 1:
-        cprint(*args, color=color, char='-', sep=sep, end=end, file=file, frame_index=2, **kvargs)
+    # Below -v nothing is formatted, pass values as keywords rather than f-strings
+    if _verbosity >= 1:
+        cprint(*args, color=color, char='-', sep=sep, end=end, file=file, **kvargs)
 
 def info(*args, sep=' ', end='\n', file=sys.stdout, **kvargs):
-    cprint(*args, color=Fore.GREEN, char='*', sep=sep, end=end, file=file, frame_index=2, **kvargs)
+    cprint(*args, color=Fore.GREEN, char='*', sep=sep, end=end, file=file, **kvargs)
 
 def warn(*args, sep=' ', end='\n', file=sys.stderr, **kvargs):
-    cprint(*args, color=Fore.YELLOW, char='!', sep=sep, end=end, file=file, frame_index=2, **kvargs)
+    cprint(*args, color=Fore.YELLOW, char='!', sep=sep, end=end, file=file, **kvargs)
 
 def error(*args, sep=' ', end='\n', file=sys.stderr, **kvargs):
-    cprint(*args, color=Fore.RED, char='!', sep=sep, end=end, file=file, frame_index=2, **kvargs)
+    cprint(*args, color=Fore.RED, char='!', sep=sep, end=end, file=file, **kvargs)
 
 def fail(*args, sep=' ', end='\n', file=sys.stderr, **kvargs):
-    cprint(*args, color=Fore.RED, char='!', sep=sep, end=end, file=file, frame_index=2, **kvargs)
-    exit(-1)
\ No newline at end of file
+    cprint(*args, color=Fore.RED, char='!', sep=sep, end=end, file=file, **kvargs)
+    exit(-1)
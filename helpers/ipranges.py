@@ -0,0 +1,84 @@
+"""Sets of IP addresses kept as merged integer intervals."""
+from bisect import bisect_left, bisect_right
+from ipaddress import IPv6Address
+from typing import Iterable, Iterator, Tuple
+
+
+class IPRangeSet:
+    """Addresses of one IP version as sorted, disjoint, non-adjacent [first, last] intervals.
+
+    Bounds are plain ints in two parallel lists, so lookups and inserts are a
+    bisect. Building a set from n ranges sorts them once, O(n log n), whatever
+    their order or overlap, and a /8 is still a single interval. Addresses
+    are never materialized: subtract_range() hands back the uncovered parts
+    as ranges, expanded by ip_strings().
+    """
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = (), version: int = 4):
+        self.version = version
+        self._firsts = []
+        self._lasts = []
+        self.update(ranges)
+
+    def update(self, ranges: Iterable[Tuple[int, int]]) -> None:
+        """Add many [first, last] ranges at once."""
+        ranges = sorted(list(ranges) + list(self.ranges()))
+        firsts, lasts = [], []
+        for first, last in ranges:
+            if lasts and first <= lasts[-1] + 1:
+                if last > lasts[-1]:
+                    lasts[-1] = last
+            else:
+                firsts.append(first)
+                lasts.append(last)
+        self._firsts, self._lasts = firsts, lasts
+
+    def add(self, first: int, last: int) -> None:
+        """Add [first, last], merging it with the intervals it touches."""
+        firsts, lasts = self._firsts, self._lasts
+        i = bisect_left(lasts, first - 1)
+        j = bisect_right(firsts, last + 1)
+        if i < j:
+            first = min(first, firsts[i])
+            last = max(last, lasts[j - 1])
+        firsts[i:j] = [first]
+        lasts[i:j] = [last]
+
+    def subtract_range(self, first: int, last: int) -> Iterator[Tuple[int, int]]:
+        """Yield the parts of [first, last] not in the set."""
+        firsts, lasts = self._firsts, self._lasts
+        for i in range(bisect_left(lasts, first), len(firsts)):
+            if firsts[i] > last:
+                break
+            if firsts[i] > first:
+                yield first, firsts[i] - 1
+            first = lasts[i] + 1
+            if first > last:
+                return
+        yield first, last
+
+    def ranges(self) -> Iterator[Tuple[int, int]]:
+        return zip(self._firsts, self._lasts)
+
+    @property
+    def num_addresses(self) -> int:
+        return sum(self._lasts) - sum(self._firsts) + len(self._firsts)
+
+    def __contains__(self, address: int) -> bool:
+        i = bisect_right(self._firsts, address) - 1
+        return i >= 0 and address <= self._lasts[i]
+
+    def __bool__(self) -> bool:
+        return bool(self._firsts)
+
+    def __repr__(self) -> str:
+        return f"IPRangeSet(version={self.version}, ranges={len(self._firsts)}, addresses={self.num_addresses})"
+
+
+def ip_strings(first: int, last: int, version: int = 4) -> Iterator[str]:
+    """Yield the addresses first..last as strings, formatted like ipaddress does."""
+    if version == 4:
+        for ip in range(first, last + 1):
+            yield '%d.%d.%d.%d' % (ip >> 24, (ip >> 16) & 255, (ip >> 8) & 255, ip & 255)
+    else:
+        for ip in range(first, last + 1):
+            yield str(IPv6Address(ip))
@@ -1,47 +1,232 @@
 import os
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from typing import List
 
+# Batching thresholds of the background writer
+FLUSH_BYTES = 64 * 1024
+FLUSH_INTERVAL = 1.0
+FSYNC_INTERVAL = 5.0
+MAX_OPEN_FILES = 256
+
+
+class LogWriter:
+    """Background writer that keeps log files open and appends lines in batches.
+
+    Callers only enqueue lines; a daemon thread groups them per file and writes
+    when FLUSH_BYTES are buffered or FLUSH_INTERVAL elapsed, and fsyncs the
+    files at most every FSYNC_INTERVAL seconds.
+    """
+    def __init__(self, flush_bytes=FLUSH_BYTES, flush_interval=FLUSH_INTERVAL,
+                 fsync_interval=FSYNC_INTERVAL, max_open_files=MAX_OPEN_FILES):
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_open_files = max_open_files
+        self.pid = os.getpid()
+        self.queue = queue.SimpleQueue()
+        self.handles = OrderedDict()
+        self.buffers = {}
+        self.buffered = 0
+        self.thread = threading.Thread(target=self._run, name="bit00-logwriter", daemon=True)
+        self.thread.start()
+
+    def write(self, path: str, line: str) -> None:
+        self.queue.put((path, line))
+
+    def flush(self, wait: bool = True, timeout: float = None, fsync: bool = False) -> None:
+        """Write everything queued so far, optionally waiting for it.
+
+        Without fsync this is only a write barrier: the lines are in the
+        files, the periodic fsync still makes them durable.
+        """
+        done = threading.Event()
+        self.queue.put((done, fsync))
+        if wait:
+            done.wait(timeout)
+
+    def close(self, timeout: float = None) -> None:
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def _run(self):
+        last_flush = last_fsync = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                self._flush(fsync=True)
+                for handle in self.handles.values():
+                    handle.close()
+                self.handles.clear()
+                return
+
+            if isinstance(item, tuple) and isinstance(item[0], threading.Event):
+                done, fsync = item
+                self._flush(fsync=fsync)
+                last_flush = time.monotonic()
+                if fsync:
+                    last_fsync = last_flush
+                done.set()
+                continue
+
+            if item:
+                path, line = item
+                self.buffers.setdefault(path, []).append(line)
+                self.buffered += len(line)
+
+            now = time.monotonic()
+            if self.buffered >= self.flush_bytes or now - last_flush >= self.flush_interval:
+                fsync = now - last_fsync >= self.fsync_interval
+                self._flush(fsync=fsync)
+                last_flush = now
+                if fsync:
+                    last_fsync = now
+
+    def _handle(self, path):
+        handle = self.handles.get(path)
+        if handle is not None:
+            self.handles.move_to_end(path)
+            return handle
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle = open(path, 'a')
+        self.handles[path] = handle
+        if len(self.handles) > self.max_open_files:
+            _, oldest = self.handles.popitem(last=False)
+            oldest.close()
+        return handle
+
+    def _flush(self, fsync=False):
+        for path, lines in self.buffers.items():
+            if not lines:
+                continue
+            try:
+                handle = self._handle(path)
+                handle.write(''.join(lines))
+                handle.flush()
+            except OSError as e:
+                print(f"[!] Failed writing {path}: {e}", file=sys.stderr)
+        self.buffers.clear()
+        self.buffered = 0
+
+        if fsync:
+            for path, handle in self.handles.items():
+                try:
+                    os.fsync(handle.fileno())
+                except OSError:
+                    pass
+
+
+_writer = None
+_timestamp = (None, None)
+_text_log = None
+
+
+def get_writer() -> LogWriter:
+    """Return this process' writer; forked workers start their own thread."""
+    global _writer
+    if _writer is None or _writer.pid != os.getpid():
+        _writer = LogWriter()
+    return _writer
+
+
+def flush_logs(wait: bool = True, fsync: bool = False) -> None:
+    """Write buffered log lines, e.g. when a task or a target finishes."""
+    if _writer is not None and _writer.pid == os.getpid():
+        _writer.flush(wait=wait, fsync=fsync)
+
+
+def close_logs() -> None:
+    """Flush everything and close the open log files."""
+    global _writer
+    if _writer is not None and _writer.pid == os.getpid():
+        _writer.close()
+        _writer = None
+
+atexit.register(close_logs)
+
+
+def _now() -> str:
+    """Log timestamp, formatted at most once per second."""
+    global _timestamp
+    second = int(time.time())
+    if _timestamp[0] != second:
+        _timestamp = (second, datetime.fromtimestamp(second).strftime('%Y%m%d:%H.%M.%S'))
+    return _timestamp[1]
+
+
 def log_command(basepath: str, tag: List[str], cmd: str) -> None:
     """Log command - saves to commands.log only"""
-    logdir = os.path.join(basepath, 'logs')
-    os.makedirs(logdir, exist_ok=True)
-    
-    timestamp = datetime.now().strftime('%Y%m%d:%H.%M.%S')
+    timestamp = _now()
     tag_str = ':'.join(tag)
-    
-    with open(os.path.join(logdir, 'commands.log'), 'a') as f:
-        f.write(f"[*] [{timestamp}]:{tag_str}:{cmd}\n")
+
+    get_writer().write(os.path.join(basepath, 'logs', 'commands.log'),
+                       f"[*] [{timestamp}]:{tag_str}:{cmd}\n")
+
+def text_log_enabled() -> bool:
+    """Whether findings are mirrored to the legacy patterns.log (BIT00_TEXT_LOG=0 disables it)."""
+    global _text_log
+    if _text_log is None:
+        _text_log = os.getenv('BIT00_TEXT_LOG', '1') != '0'
+    return _text_log
+
+def finding_record(tag: List[str], desc: str, match: str) -> dict:
+    """Build the typed findings.jsonl record of a pattern match.
+
+    tag is [phase, plugin[:service], target]; for portscan findings desc holds
+    the proto/port/service triple and match the version details.
+    """
+    phase = tag[0]
+    plugin, _, service = tag[1].partition(':') if len(tag) > 1 else ('', '', '')
+    kind = desc
+    if phase == 'portscan':
+        service, kind = desc, 'service'
+
+    return {
+        'ts': round(time.time(), 3),
+        'phase': phase,
+        'plugin': plugin,
+        'target': ':'.join(tag[2:]),
+        'service': service or None,
+        'kind': kind,
+        'value': match,
+    }
 
 def log_pattern(basepath: str, tag: List[str], desc: str, match: str) -> None:
-    """Log pattern - saves to patterns.log only"""
-    logdir = os.path.join(basepath, 'logs')
-    os.makedirs(logdir, exist_ok=True)
-    
-    timestamp = datetime.now().strftime('%Y%m%d:%H.%M.%S')
-    tag_str = ':'.join(tag)
-    
-    with open(os.path.join(logdir, 'patterns.log'), 'a') as f:
-        f.write(f"[*] [{timestamp}]:{tag_str}:{desc}:{match}\n")
+    """Log pattern - saves to findings.jsonl and, unless disabled, patterns.log"""
+    writer = get_writer()
+    record = finding_record(tag, desc, match)
+    writer.write(os.path.join(basepath, 'logs', 'findings.jsonl'),
+                 json.dumps(record, ensure_ascii=False) + "\n")
+
+    if text_log_enabled():
+        timestamp = _now()
+        tag_str = ':'.join(tag)
+        writer.write(os.path.join(basepath, 'logs', 'patterns.log'),
+                     f"[*] [{timestamp}]:{tag_str}:{desc}:{match}\n")
 
 def log_error(basepath: str, tag: List[str], err: str) -> None:
     """Log error - saves to error.log only"""
-    logdir = os.path.join(basepath, 'logs')
-    os.makedirs(logdir, exist_ok=True)
-    
-    timestamp = datetime.now().strftime('%Y%m%d:%H.%M.%S')
+    timestamp = _now()
     tag_str = ':'.join(tag)
-    
-    with open(os.path.join(logdir, 'error.log'), 'a') as f:
-        f.write(f"[-] [{timestamp}]:{tag_str}:Error:{err}\n")
+
+    get_writer().write(os.path.join(basepath, 'logs', 'error.log'),
+                       f"[-] [{timestamp}]:{tag_str}:Error:{err}\n")
 
 def log_info(basepath: str, tag: List[str], message: str) -> None:
     """Log general info - saves to scanner.log only"""
-    logdir = os.path.join(basepath, 'logs')
-    os.makedirs(logdir, exist_ok=True)
-    
-    timestamp = datetime.now().strftime('%Y%m%d:%H.%M.%S')
+    timestamp = _now()
     tag_str = ':'.join(tag)
-    
-    with open(os.path.join(logdir, 'scanner.log'), 'a') as f:
-        f.write(f"[*] [{timestamp}]:{tag_str}:{message}\n")
\ No newline at end of file
+
+    get_writer().write(os.path.join(basepath, 'logs', 'scanner.log'),
+                       f"[*] [{timestamp}]:{tag_str}:{message}\n")
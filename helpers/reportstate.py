@@ -0,0 +1,140 @@
+"""Checkpoints for incremental report generation."""
+import os
+import json
+import pickle
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+STATE_VERSION = 1
+# Structured findings written next to patterns.log by helpers.logger
+FINDINGS_LOG = 'findings.jsonl'
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def legacy_cutoff(patterns_log_path: str) -> Optional[str]:
+    """patterns.log timestamp from which the findings.jsonl next to it takes over.
+
+    Logs directories from before findings.jsonl existed keep that history only
+    in patterns.log, so its lines stamped earlier than the first findings
+    record are still parsed; later ones are mirrors of findings.jsonl. None
+    means there are no findings records and the whole patterns.log counts.
+    """
+    findings_path = os.path.join(os.path.dirname(patterns_log_path), FINDINGS_LOG)
+    try:
+        with open(findings_path, 'rb') as f:
+            first_ts = json.loads(f.readline())['ts']
+        # Same fixed width format as the patterns.log stamps, compared as strings
+        return datetime.fromtimestamp(int(first_ts)).strftime('%Y%m%d:%H.%M.%S')
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class LogTail:
+    """Iterate the lines of a log starting at a byte offset.
+
+    Only complete lines are yielded, iteration stops at a trailing line that
+    is still being written so the next run reads it whole.
+    """
+    def __init__(self, path: str, offset: int = 0):
+        self.path = path
+        self.offset = offset
+        self.last_line = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                self.offset += len(raw)
+                self.last_line = raw
+                yield raw.decode('utf-8', errors='ignore')
+
+
+class ReportState:
+    """Per-log checkpoints (inode, offset, last line hash) plus the parser aggregate.
+
+    On a re-run only the bytes appended after each checkpoint are parsed and
+    merged into the saved aggregate. If any known log was truncated, replaced
+    or removed the aggregate can no longer be trusted and everything is
+    parsed again.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.checkpoints: Dict[str, dict] = {}
+        self.aggregate = None
+
+    def load(self) -> bool:
+        """Load a previously saved state, returns False if there is none usable."""
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return False
+
+        if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+            return False
+
+        self.checkpoints = state.get('checkpoints', {})
+        self.aggregate = state.get('aggregate')
+        return True
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': STATE_VERSION, 'checkpoints': self.checkpoints,
+                         'aggregate': self.aggregate}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def _is_valid(self, log_path: str, checkpoint: dict) -> bool:
+        try:
+            st = os.stat(log_path)
+        except OSError:
+            return False
+
+        if st.st_ino != checkpoint['inode'] or st.st_size < checkpoint['offset']:
+            return False
+
+        tail_len = checkpoint.get('tail_len', 0)
+        if not tail_len:
+            return True
+
+        with open(log_path, 'rb') as f:
+            f.seek(checkpoint['offset'] - tail_len)
+            return _digest(f.read(tail_len)) == checkpoint['tail']
+
+    def resume_offsets(self, log_paths: List[str]) -> Optional[Dict[str, int]]:
+        """Return the offset to resume each log from, or None if a full re-parse is needed."""
+        if self.aggregate is None:
+            return None
+
+        for log_path, checkpoint in self.checkpoints.items():
+            if log_path not in log_paths or not self._is_valid(log_path, checkpoint):
+                return None
+
+        return {log_path: self.checkpoints.get(log_path, {}).get('offset', 0) for log_path in log_paths}
+
+    def reset(self) -> None:
+        self.checkpoints = {}
+        self.aggregate = None
+
+    def update(self, tail: LogTail) -> None:
+        """Record how far tail was parsed."""
+        checkpoint = self.checkpoints.get(tail.path, {})
+        checkpoint['inode'] = os.stat(tail.path).st_ino
+        checkpoint['offset'] = tail.offset
+        if tail.last_line is not None:
+            checkpoint['tail_len'] = len(tail.last_line)
+            checkpoint['tail'] = _digest(tail.last_line)
+        self.checkpoints[tail.path] = checkpoint
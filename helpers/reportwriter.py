@@ -0,0 +1,71 @@
+"""Streaming JSON/XML report writers.
+
+Reports are written one host at a time instead of building the whole
+document in memory first, so peak memory stays bounded by a single host.
+"""
+import json
+from contextlib import contextmanager
+from xml.sax.saxutils import XMLGenerator
+
+INDENT = "  "
+
+
+class JsonObject:
+    """Lazily produced JSON object, items is an iterable of (key, value)"""
+    def __init__(self, items):
+        self.items = items
+
+
+class JsonArray:
+    """Lazily produced JSON array, values is an iterable"""
+    def __init__(self, values):
+        self.values = values
+
+
+def write_json(f, value, level=0):
+    """Write value to f exactly as json.dump(value, f, indent=2, ensure_ascii=False) would.
+
+    JsonObject/JsonArray values are consumed item by item, any other value
+    is encoded as a whole.
+    """
+    if isinstance(value, JsonObject):
+        _write_container(f, ((json.dumps(key, ensure_ascii=False) + ": ", item) for key, item in value.items), "{", "}", level)
+    elif isinstance(value, JsonArray):
+        _write_container(f, (("", item) for item in value.values), "[", "]", level)
+    else:
+        text = json.dumps(value, indent=2, ensure_ascii=False)
+        if level and "\n" in text:
+            text = text.replace("\n", "\n" + INDENT * level)
+        f.write(text)
+
+
+def _write_container(f, items, opening, closing, level):
+    inner = INDENT * (level + 1)
+    empty = True
+    for prefix, item in items:
+        f.write(f"{opening}\n{inner}{prefix}" if empty else f",\n{inner}{prefix}")
+        empty = False
+        write_json(f, item, level + 1)
+    f.write(opening + closing if empty else f"\n{INDENT * level}{closing}")
+
+
+class XmlWriter:
+    """Thin wrapper over XMLGenerator writing elements as they are produced"""
+    def __init__(self, f, encoding='utf-8'):
+        self.xml = XMLGenerator(f, encoding=encoding, short_empty_elements=True)
+        self.xml.startDocument()
+
+    @contextmanager
+    def element(self, name, attrs=None):
+        self.xml.startElement(name, attrs or {})
+        yield self
+        self.xml.endElement(name)
+
+    def text_element(self, name, text, attrs=None):
+        self.xml.startElement(name, attrs or {})
+        if text is not None:
+            self.xml.characters(str(text))
+        self.xml.endElement(name)
+
+    def close(self):
+        self.xml.endDocument()
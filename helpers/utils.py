@@ -1,9 +1,12 @@
 """Common utility functions for Bit00 framework."""
+import os
+import re
 import ipaddress
-import tldextract
 import time
-from typing import List
-from ipaddress import ip_address, ip_network, summarize_address_range, ip_interface
+from functools import lru_cache
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, List, Tuple, Union
+from ipaddress import ip_address, ip_network, summarize_address_range, ip_interface, IPv4Address
+from helpers.ipranges import IPRangeSet, ip_strings
 
 # =============================================================================
 # VALIDATED TARGETS IF IPADDRESS, CIDR OR HOSTNAME
@@ -19,9 +22,7 @@ def is_domain(domain: str) -> bool:
         True if valid domain, False otherwise
     """
     try:
-        _domain = tldextract.extract(domain)
-        if _domain.domain and _domain.suffix:
-            return True
+        return _domain_parts(domain)[2]
     except Exception:
         return False
 
@@ -74,22 +75,103 @@ def expand_cidr(cidr: str) -> List[str]:
 # EXTRACT BASEDOMAIN AND FQDN
 # =============================================================================
 
-_extract = tldextract.TLDExtract()
-@staticmethod
+# Distinct names remembered by the helpers below
+DOMAIN_CACHE_SIZE = 1 << 16
+
+_extract = None
+
+def _tld_extractor():
+    """Return the shared TLDExtract, tldextract is only imported on first use.
+
+    Only the public suffix list snapshot bundled with tldextract is used, no
+    download and no cache file, so lookups behave the same on air-gapped hosts.
+    """
+    global _extract
+    if _extract is None:
+        import tldextract
+        _extract = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+    return _extract
+
+@lru_cache(maxsize=DOMAIN_CACHE_SIZE)
+def _domain_parts(name: str) -> Tuple[str, str, bool]:
+    """Return (fqdn, base domain, is a domain) of name, split once per distinct name."""
+    parts = _tld_extractor()(name)
+    return parts.fqdn, f"{parts.domain}.{parts.suffix}", bool(parts.domain and parts.suffix)
+
 def extract_base_domain(url):
-    return str(_extract(url).domain + '.' + _extract(url).suffix)
+    return _domain_parts(url)[1]
 
-@staticmethod
 def extract_fqdn(subdomain):
-    return _extract(subdomain).fqdn
+    if not subdomain:
+        return ''
+    return _domain_parts(subdomain)[0]
 
 
 # =============================================================================
 # PARSE TARGETS ON ARGS MENU
 # =============================================================================
 
-def parse_targets(target: str) -> List[str]:
-    """Parse target string into list of targets.
+# Plain IPv4 address or CIDR, the bulk of large scope and exclusion files
+_IPV4_SPEC = re.compile(r'(?:0|[1-9]\d{0,2})(?:\.(?:0|[1-9]\d{0,2})){3}(?:/(?:0|[1-9]\d?))?')
+
+def _ipv4_range(target: str):
+    """Parse a plain IPv4 address or CIDR without ipaddress, None when target is anything else."""
+    if not _IPV4_SPEC.fullmatch(target):
+        return None
+    address, _, prefix = target.partition('/')
+    octets = [int(octet) for octet in address.split('.')]
+    prefix = int(prefix) if prefix else 32
+    if max(octets) > 255 or prefix > 32:
+        return None
+    ip = (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3]
+    host_mask = (1 << (32 - prefix)) - 1
+    return IPv4Address(ip & ~host_mask), IPv4Address(ip | host_mask)
+
+def _target_range(target: str):
+    """Return the (first, last) addresses of an IP/CIDR/range target, None for domains.
+
+    Raises:
+        ValueError: If target is neither an IP specification nor a domain
+    """
+    bounds = _ipv4_range(target)
+    if bounds is not None:
+        return bounds
+
+    # Handle IP range with hyphen
+    if "-" in target:
+        start_ip, end_ip = target.split("-")
+        start_ip = ip_address(start_ip)
+        try:
+            # Full IP for end range
+            end_ip = ip_address(end_ip)
+        except ValueError:
+            # Short notation (e.g. 192.168.1.1-10)
+            first_three_octets = str(start_ip).split(".")[:-1]
+            first_three_octets.append(end_ip)
+            end_ip = ip_address(".".join(first_three_octets))
+        if start_ip.version != end_ip.version or start_ip > end_ip:
+            raise ValueError("last IP address must be greater than first")
+        return start_ip, end_ip
+
+    # Handle CIDR and single IPs
+    try:
+        # IPv6 link-local addresses are kept as given (they may carry a scope)
+        if ip_interface(target).ip.version == 6 and ip_address(target).is_link_local:
+            return None
+    except ValueError:
+        pass
+    try:
+        # CIDR or single IP
+        network = ip_network(target, strict=False)
+        return network[0], network[-1]
+    except ValueError:
+        # If not an IP/CIDR, treat as domain
+        if is_domain(target):
+            return None
+        raise ValueError(f"Invalid target format: {target}")
+
+def iter_targets(target: str) -> Iterator[str]:
+    """Lazily expand a target string into targets.
     
     Supports:
     - Single IP: 192.168.1.1
@@ -98,52 +180,142 @@ def parse_targets(target: str) -> List[str]:
     - Domain: example.com
     - IPv6: 2001:db8::1
     
+    The target is validated right away, addresses are only produced while
+    the returned iterator is consumed.
+    
     Args:
         target: Target specification
         
     Returns:
-        List of expanded targets
+        Iterator over the expanded targets
+        
+    Raises:
+        ValueError: If invalid target format
     """
-    targets = []
     target = target.strip()
-    
     try:
-        # Handle IP range with hyphen
-        if "-" in target:
-            start_ip, end_ip = target.split("-")
-            try:
-                # Full IP for end range
-                end_ip = ip_address(end_ip)
-            except ValueError:
-                # Short notation (e.g. 192.168.1.1-10)
-                first_three_octets = start_ip.split(".")[:-1]
-                first_three_octets.append(end_ip)
-                end_ip = ip_address(".".join(first_three_octets))
-            
-            for ip_range in summarize_address_range(ip_address(start_ip), end_ip):
-                targets.extend(str(ip) for ip in ip_range)
-                
-        # Handle CIDR and single IPs
-        else:
-            try:
-                # IPv6 link-local addresses
-                if ip_interface(target).ip.version == 6 and ip_address(target).is_link_local:
-                    targets.append(str(target))
-                else:
-                    # CIDR or single IP
-                    network = ip_network(target, strict=False)
-                    targets.extend(str(ip) for ip in network)
-            except ValueError:
-                # If not an IP/CIDR, treat as domain
-                if is_domain(target):
-                    targets.append(target)
-                else:
-                    raise ValueError(f"Invalid target format: {target}")
-                    
+        bounds = _target_range(target)
     except Exception as e:
         raise ValueError(f"Failed to parse target '{target}': {str(e)}")
+    
+    if bounds is None:
+        return iter((target,))
+    first, last = bounds
+    return ip_strings(int(first), int(last), first.version)
+
+def parse_targets(target: str) -> List[str]:
+    """Parse target string into list of targets.
+    
+    See iter_targets() for the supported formats.
+    
+    Args:
+        target: Target specification
         
-    return targets
+    Returns:
+        List of expanded targets
+    """
+    return list(iter_targets(target))
+
+def read_target_specs(target_inputs: Iterable[str], on_error: Callable = None) -> Iterator[str]:
+    """Yield target specifications, reading target files line by line.
+    
+    Args:
+        target_inputs: Targets or paths of files with one target per line
+        on_error: Called with (input, exception) when a file cannot be read
+    """
+    for target_input in target_inputs:
+        if os.path.isfile(target_input):
+            try:
+                with open(target_input) as target_file:
+                    for line in target_file:
+                        line = line.strip()
+                        if line and not line.startswith('#'):  # Skip empty lines and comments
+                            yield line
+            except OSError as e:
+                if on_error is None:
+                    raise
+                on_error(target_input, e)
+        else:
+            yield target_input
+
+def invalid_target_specs(target_inputs: Iterable[str], on_error: Callable = None) -> Iterator[Tuple[str, ValueError]]:
+    """Yield (spec, error) for every specification that expand_targets() would reject.
+    
+    Syntax only: ranges and CIDRs are parsed but not expanded, so a whole
+    scope file is checked before anything is scanned.
+    
+    Args:
+        target_inputs: Targets or files of targets, see read_target_specs()
+        on_error: Called with (input, exception) when a file cannot be read
+    """
+    for spec in read_target_specs(target_inputs, on_error):
+        try:
+            _target_range(spec.strip())
+        except ValueError as e:
+            yield spec, e
+
+async def aiter_targets(targets: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    """Iterate targets whether they come from expand_targets() or an async source (e.g. a host sweep)."""
+    if hasattr(targets, '__aiter__'):
+        async for target in targets:
+            yield target
+    else:
+        for target in targets:
+            yield target
+
+def expand_targets(target_inputs: Iterable[str], exclude: Iterable[str] = (),
+                   on_error: Callable = None) -> Iterator[str]:
+    """Lazily expand, deduplicate and filter target inputs.
+    
+    Inputs are expanded in order as the iterator is consumed. Addresses are
+    deduplicated and excluded through IPRangeSets, so memory grows with the
+    number of specifications and not with the size of the scope.
+    
+    Args:
+        target_inputs: Targets or files of targets, see read_target_specs()
+        exclude: Targets or files of targets to skip
+        on_error: Called with (spec, exception) for invalid specifications,
+                  which are skipped; without it the ValueError propagates
+        
+    Returns:
+        Iterator over unique targets
+    """
+    def _ranges(target):
+        try:
+            return _target_range(target.strip())
+        except ValueError as e:
+            if on_error is None:
+                raise
+            on_error(target, e)
+            return False
+
+    # Addresses already produced or excluded, per IP version
+    excluded = {4: [], 6: []}
+    seen_names = set()
+    for spec in read_target_specs(exclude, on_error):
+        bounds = _ranges(spec)
+        if bounds is None:
+            seen_names.add(spec.strip())
+        elif bounds:
+            excluded[bounds[0].version].append((int(bounds[0]), int(bounds[1])))
+    seen = {version: IPRangeSet(ranges, version) for version, ranges in excluded.items()}
+
+    for spec in read_target_specs(target_inputs, on_error):
+        bounds = _ranges(spec)
+        if bounds is False:
+            continue
+        if bounds is None:
+            name = spec.strip()
+            if name not in seen_names:
+                seen_names.add(name)
+                yield name
+            continue
+
+        first, last = bounds
+        ranges = seen[first.version]
+        for part_first, part_last in list(ranges.subtract_range(int(first), int(last))):
+            yield from ip_strings(part_first, part_last, first.version)
+        ranges.add(int(first), int(last))
 
 
 # =============================================================================
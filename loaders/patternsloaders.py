@@ -1,32 +1,256 @@
+import re
+import os
 import importlib.util
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse, sre_constants
 from pathlib import Path
 #from helpers.io import error
 
+# module -> PatternsLoader, shared by every runcommand in the process
+_LOADERS = {}
+
+# Re-import patterns.py when it changes on disk (BIT00_PATTERNS_RELOAD=1)
+HOT_RELOAD = os.getenv('BIT00_PATTERNS_RELOAD', '0') == '1'
+
+_NAMED_GROUP = re.compile(r'\(\?P<[^>]+>')
+_GLOBAL_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+_BACKREF = re.compile(r'\\[1-9]|\(\?P=')
+# Bytes outside tab and printable ASCII, where bytes and str regexes may disagree
+_NOT_PLAIN = re.compile(rb'[^\t\x20-\x7e]')
+# Shorter literals are in too many lines to be worth checking
+MIN_LITERAL = 3
+
+
+def _strip_wildcards(source: str) -> str:
+    """Drop a leading/trailing '.*', which cannot change whether a search finds a match
+    but makes it rescan the rest of the line from every position."""
+    if source.startswith('.*') and source[2:3] not in ('?', '+'):
+        source = source[2:]
+    if source.endswith('.*') and not source.endswith('\\.*'):
+        source = source[:-2]
+    return source
+
+
+def _required_literal(regex):
+    """Longest ASCII literal every match of regex contains, as (bytes, ignorecase).
+
+    Only literals of the top-level sequence (and of groups in it) are
+    required, anything under a branch or a repeat is skipped.
+    """
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except (re.error, TypeError):
+        return b'', False
+    best = (b'', False)
+
+    def walk(items, ignorecase):
+        nonlocal best
+        run = []
+        for op, av in list(items) + [(None, None)]:
+            if op == sre_constants.LITERAL and av < 128:
+                run.append(av)
+                continue
+            if len(run) > len(best[0]):
+                best = (bytes(run).lower() if ignorecase else bytes(run), ignorecase)
+            run = []
+            if op == sre_constants.SUBPATTERN:
+                _, add_flags, del_flags, sub = av
+                walk(sub, bool((ignorecase or add_flags & re.IGNORECASE) and not del_flags & re.IGNORECASE))
+
+    walk(parsed, bool(parsed.state.flags & re.IGNORECASE))
+    return best
+
+
+class CompiledPatterns:
+    """Patterns of a single tool, compiled once.
+
+    Every pattern is also folded into one alternation used as a prefilter, so
+    the vast majority of output lines (the ones that match nothing) are
+    rejected with a single scan instead of one re.search per pattern.
+    The same expression compiled as bytes lets the stream readers reject raw
+    lines before decoding them, and when every pattern requires a literal a
+    whole chunk of output without any of them is skipped with a few
+    substring searches.
+    """
+    def __init__(self, patterns: list):
+        self.entries = []
+        for p in patterns or []:
+            # pattern entries may be dicts with 'pattern' key
+            pat = p.get('pattern') if isinstance(p, dict) else None
+            if not pat:
+                continue
+            try:
+                self.entries.append((re.compile(pat), p))
+            except re.error:
+                # invalid regex; skip
+                continue
+        self.prefilter = self._build_prefilter()
+        self.byte_prefilter = self._build_byte_prefilter()
+        self.literals = self._build_literals()
+
+    def _build_prefilter(self):
+        if len(self.entries) < 2:
+            return None
+
+        parts = []
+        for regex, _ in self.entries:
+            source = regex.pattern
+            if _BACKREF.search(source):
+                return None
+            # Named groups repeat across patterns and global flags must lead the
+            # whole expression, so rewrite both before joining.
+            source = _NAMED_GROUP.sub('(?:', _strip_wildcards(source))
+            source = _GLOBAL_FLAGS.sub(r'(?\1:', source, count=1) + (')' if _GLOBAL_FLAGS.match(source) else '')
+            parts.append(f"(?:{source})")
+
+        try:
+            return re.compile('|'.join(parts))
+        except re.error:
+            return None
+
+    def _build_byte_prefilter(self):
+        if self.prefilter is not None:
+            source = self.prefilter.pattern
+        elif len(self.entries) == 1:
+            source = self.entries[0][0].pattern
+        else:
+            return None
+        if not source.isascii():
+            return None
+        try:
+            return re.compile(source.encode('ascii'))
+        except re.error:
+            return None
+
+    def _build_literals(self):
+        """(case-sensitive, lowercased case-insensitive) literals, or None if a pattern has none."""
+        sensitive, insensitive = set(), set()
+        for regex, _ in self.entries:
+            literal, ignorecase = _required_literal(regex)
+            if len(literal) < MIN_LITERAL:
+                return None
+            (insensitive if ignorecase else sensitive).add(literal)
+        return tuple(sensitive), tuple(insensitive)
+
+    def may_match_any(self, lines) -> bool:
+        """Whether any of the undecoded lines can match, checked on the whole chunk."""
+        if not self.entries:
+            return False
+        if self.literals is None:
+            return True
+        chunk = b'\n'.join(lines)
+        if not chunk.isascii():
+            # Decoding may drop bytes and str patterns fold non-ASCII case
+            return True
+        sensitive, insensitive = self.literals
+        if any(literal in chunk for literal in sensitive):
+            return True
+        if insensitive:
+            chunk = chunk.lower()
+            return any(literal in chunk for literal in insensitive)
+        return False
+
+    def may_match(self, raw: bytes) -> bool:
+        """Whether the undecoded line raw can match any pattern."""
+        if not self.entries:
+            return False
+        if self.byte_prefilter is None or _NOT_PLAIN.search(raw):
+            return True
+        return self.byte_prefilter.search(raw) is not None
+
+    def search(self, line: str):
+        """Yield (pattern entry, match) for every pattern found in line."""
+        if self.prefilter is not None and not self.prefilter.search(line):
+            return
+        for regex, entry in self.entries:
+            match = regex.search(line)
+            if match:
+                yield entry, match
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def get_patterns_loader(module: str, hot_reload: bool = None) -> 'PatternsLoader':
+    """Return the process-wide PatternsLoader of module, importing patterns.py once."""
+    loader = _LOADERS.get(module)
+    if loader is None:
+        loader = PatternsLoader(module)
+        _LOADERS[module] = loader
+    elif HOT_RELOAD if hot_reload is None else hot_reload:
+        loader.reload_if_changed()
+    return loader
+
+
+def get_compiled_patterns(module: str, mode: str, tool: str) -> CompiledPatterns:
+    """Return the compiled patterns of tool, compiling them on first use."""
+    return get_patterns_loader(module).get_compiled(mode, tool)
+
+
 class PatternsLoader:
     def __init__(self, module: str):
         repo_root = Path(__file__).resolve().parent.parent
         m_patterns = repo_root / 'modules' / module / 'patterns.py'
         self.patterns_file = m_patterns
+        self.mtime = None
         self.patterns = self.load_patterns()
+        self.build_index()
 
     def load_patterns(self):
         if not self.patterns_file.exists():
             raise FileNotFoundError(f"Patterns file not found: {self.patterns_file}")
         
+        self.mtime = self.patterns_file.stat().st_mtime_ns
+
         # Import the module dynamically
         spec = importlib.util.spec_from_file_location("patterns_module", self.patterns_file)
         patterns_module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(patterns_module)
         
         return getattr(patterns_module, "PATTERNS", {})
-       
+
+    def build_index(self):
+        """Index tools by name (first mode defining them wins) and GlobalPatterns by mode."""
+        self.by_name = {}
+        self.global_patterns = {}
+        last_global = None
+        for mode, tools in self.patterns.items():
+            for name, patterns in tools.items():
+                self.by_name.setdefault(name, patterns)
+            if "GlobalPatterns" in tools:
+                self.global_patterns[mode] = tools["GlobalPatterns"]
+                last_global = tools["GlobalPatterns"]
+        self.default_global = last_global
+        self.compiled = {}
+
+    def reload_if_changed(self):
+        """Re-import patterns.py if it was modified since it was loaded."""
+        try:
+            mtime = self.patterns_file.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        self.patterns = self.load_patterns()
+        self.build_index()
+        return True
+
+    def get_compiled(self, mode, name: str) -> CompiledPatterns:
+        key = (mode, name)
+        compiled = self.compiled.get(key)
+        if compiled is None:
+            compiled = CompiledPatterns(self.get_patterns_by_name(mode, name))
+            self.compiled[key] = compiled
+        return compiled
     
     def get_patterns_by_mode(self, mode: str):
         return self.patterns.get(mode, {})
     
     def get_patterns_by_name(self, mode, name: str):
-        for mode, tools in self.patterns.items():
-            if name in tools.keys():
-                return self.patterns[mode][name]
+        if name in self.by_name:
+            return self.by_name[name]
 
-        return self.patterns[mode]["GlobalPatterns"]
+        # Unknown tools fall back to the GlobalPatterns of their mode
+        return self.global_patterns.get(mode, self.default_global)
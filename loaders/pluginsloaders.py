@@ -1,12 +1,33 @@
 """Plugin manager"""
 import importlib.util
 import inspect
+import json
 import os
+import re
 import sys
 from os import listdir
 from os.path import join as path_join
 from os.path import dirname, exists, abspath
 
+# Process-wide plugin registry shared by every PluginLoader instance.
+# Rebuilt only when the mtime of the plugins directory changes, from the
+# manifest when no plugin file changed since it was written.
+_REGISTRY = {
+    'root': None,
+    'signature': None,
+    'plugins': {},
+    'by_tag': {},
+    'by_module': {},
+    'by_path': {},
+    'dispatch': {},
+}
+
+# Metadata of every plugin, so a run does not have to execute all of plugins/
+# to learn their tags and settings. Kept next to the bytecode cache.
+MANIFEST_FILE = path_join('__pycache__', 'manifest.json')
+MANIFEST_VERSION = 1
+_MANIFEST_FIELDS = ('path', 'module_name', 'description', 'supported_modules', 'tag', 'services_matches',
+                    'run_once', 'cost', 'cache_ttl', 'parse_output', 'class_name')
 
 class PluginLoader:
     def __init__(self):
@@ -46,6 +67,9 @@ class PluginLoader:
                 attrs['tag'] = getattr(instance, 'tag', [])
                 attrs['services_matches'] =getattr(instance, 'services_matches', ())
                 attrs['run_once'] = getattr(instance, 'run_once', False)
+                attrs['cost'] = getattr(instance, 'cost', 1)
+                attrs['cache_ttl'] = getattr(instance, 'cache_ttl', 0)
+                attrs['parse_output'] = getattr(instance, 'parse_output', True)
                 attrs['supported_modules'] = getattr(instance, 'supported_modules', [])
                 attrs['class_name'] = class_obj.__name__
                 attrs['class_object'] = class_obj
@@ -61,6 +85,9 @@ class PluginLoader:
                     attrs['tag'] = getattr(class_obj, 'tag', [])
                     attrs['services_matches'] =getattr(class_obj, 'services_matches', ())
                     attrs['run_once'] = getattr(class_obj, 'run_once', False)
+                    attrs['cost'] = getattr(class_obj, 'cost', 1)
+                    attrs['cache_ttl'] = getattr(class_obj, 'cache_ttl', 0)
+                    attrs['parse_output'] = getattr(class_obj, 'parse_output', True)
                     attrs['supported_modules'] = getattr(class_obj, 'supported_modules', [])
                     attrs['class_name'] = class_obj.__name__
                     attrs['class_object'] = class_obj
@@ -99,6 +126,9 @@ class PluginLoader:
                     'tag': attrs.get('tag', []),
                     'services_matches': attrs.get('services_matches',()),
                     'run_once': attrs.get('run_once', True),
+                    'cost': attrs.get('cost', 1),
+                    'cache_ttl': attrs.get('cache_ttl', 0),
+                    'parse_output': attrs.get('parse_output', True),
                     'class_name': attrs.get('class_name'),
                     'class_object': attrs.get('class_object'),
                     'instance': attrs.get('instance')  # Store the pre-created instance
@@ -111,6 +141,13 @@ class PluginLoader:
 
     def load_plugin(self, plugin_path):
         """Load a plugin module and return the module object (or None)."""
+        registry = self._registry()
+        entry = None
+        if registry and plugin_path in registry['by_path']:
+            entry = registry['plugins'][registry['by_path'][plugin_path]]
+            class_object = entry.get('class_object')
+            if class_object:
+                return class_object
         try:
             plugin_name = os.path.splitext(os.path.basename(plugin_path))[0]
             module_name = f"bit00.plugins.{plugin_name}"
@@ -121,6 +158,10 @@ class PluginLoader:
             # If the plugin defines a discoverable class, return the class object
             attrs = self._plugin_attrs_from_module(module)
             if attrs and attrs.get('class_object'):
+                if entry is not None:
+                    # Registries built from the manifest import plugins on first use
+                    entry['class_object'] = attrs['class_object']
+                    entry['instance'] = attrs.get('instance')
                 return attrs.get('class_object')
             # Fallback: return the module itself (module-level-style plugin)
             return module
@@ -130,17 +171,62 @@ class PluginLoader:
     
     
 
-    def list_plugins(self):
-        """List plugins without initializing them. Returns dict name->info."""
+    @staticmethod
+    def _plugin_files(plugins_path):
+        """Return [file, size, mtime] of every plugin file, the manifest is valid while they match."""
+        files = []
+        for item in sorted(listdir(plugins_path)):
+            if item.endswith('.py') and item != '__init__.py':
+                st = os.stat(path_join(plugins_path, item))
+                files.append([item, st.st_size, st.st_mtime_ns])
+        return files
+
+    def _load_manifest(self, plugins_path, files):
+        """Return dict name->info from the manifest, None if it is missing or stale."""
+        try:
+            with open(path_join(plugins_path, MANIFEST_FILE), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('root') != plugins_path \
+                or manifest.get('files') != files:
+            return None
+
         plugins = {}
-        plugins_path = path_join(self.root_dir, "plugins")
-        
-        if not os.path.exists(plugins_path):
-            print(f"Plugins directory not found at {plugins_path}")
-            return plugins
-            
+        for name, info in manifest['plugins'].items():
+            info['services_matches'] = tuple(info['services_matches'])
+            info['class_object'] = None
+            info['instance'] = None
+            plugins[name] = info
+        return plugins
+
+    def _save_manifest(self, plugins_path, files, plugins):
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'root': plugins_path,
+            'files': files,
+            'plugins': {name: {key: info[key] for key in _MANIFEST_FIELDS} for name, info in plugins.items()},
+        }
+        path = path_join(plugins_path, MANIFEST_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
         try:
-            items = [i for i in listdir(plugins_path) if i.endswith('.py') and i != '__init__.py']
+            os.makedirs(dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            # Read-only checkout or a plugin attribute that is not JSON, scan again next time
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _scan_plugins(self, plugins_path, files=None):
+        """Execute every plugin file once and return dict name->info."""
+        plugins = {}
+        try:
+            items = [item for item, _, _ in files] if files is not None else \
+                sorted(i for i in listdir(plugins_path) if i.endswith('.py') and i != '__init__.py')
         except OSError as e:
             print(f"Error accessing plugins directory: {e}")
             return plugins
@@ -154,5 +240,164 @@ class PluginLoader:
                 plugins[name] = info
         return plugins
 
-   
+    def _registry(self):
+        """Return the process-wide registry, rebuilding it if plugins/ changed."""
+        plugins_path = path_join(self.root_dir, "plugins")
+
+        try:
+            signature = os.stat(plugins_path).st_mtime_ns
+        except OSError:
+            print(f"Plugins directory not found at {plugins_path}")
+            return None
+
+        if _REGISTRY['signature'] != signature or _REGISTRY['root'] != plugins_path:
+            try:
+                files = self._plugin_files(plugins_path)
+            except OSError:
+                files = None
+            plugins = self._load_manifest(plugins_path, files) if files is not None else None
+            if plugins is None:
+                plugins = self._scan_plugins(plugins_path, files)
+                if files is not None:
+                    self._save_manifest(plugins_path, files, plugins)
+            by_tag, by_module, by_path = {}, {}, {}
+            for name, info in plugins.items():
+                for tag in info['tag']:
+                    by_tag.setdefault(tag, []).append(name)
+                for module in info['supported_modules']:
+                    by_module.setdefault(module, []).append(name)
+                by_path[info['path']] = name
+
+            _REGISTRY.update({
+                'root': plugins_path,
+                'signature': signature,
+                'plugins': plugins,
+                'by_tag': by_tag,
+                'by_module': by_module,
+                'by_path': by_path,
+                'dispatch': {},
+            })
+        return _REGISTRY
+
+    @staticmethod
+    def _copy(info):
+        """Callers append the target to the tag list, so hand out a private copy."""
+        props = dict(info)
+        props['tag'] = list(info['tag'])
+        return props
+
+    def invalidate(self):
+        """Force a rescan of plugins/ on the next lookup."""
+        _REGISTRY['signature'] = None
+
+    def list_plugins(self):
+        """List plugins without initializing them. Returns dict name->info."""
+        registry = self._registry()
+        if not registry:
+            return {}
+        return {name: self._copy(info) for name, info in registry['plugins'].items()}
+
+    def get_plugin(self, name):
+        """Return the plugin registered under an exact name, or None."""
+        registry = self._registry()
+        if not registry or name not in registry['plugins']:
+            return None
+        return self._copy(registry['plugins'][name])
+
+    def plugin_setting(self, name, key, default=None):
+        """Return a scheduling attribute (cost, cache_ttl, parse_output) of a registered plugin."""
+        registry = self._registry()
+        if not registry or name not in registry['plugins']:
+            return default
+        return registry['plugins'][name].get(key, default)
+
+    def plugin_cost(self, name):
+        """Scan slots the plugin takes while running (its cost attribute, 1 by default)."""
+        return self.plugin_setting(name, 'cost', 1)
+
+    def get_plugins_by_module(self, module):
+        """Return dict name->info of plugins supporting the given module."""
+        registry = self._registry()
+        if not registry:
+            return {}
+        return {name: self._copy(registry['plugins'][name])
+                for name in registry['by_module'].get(module, [])}
+
+    def get_plugins_by_tag(self, tag, module=None):
+        """Return dict name->info of plugins carrying tag, optionally limited to a module."""
+        registry = self._registry()
+        if not registry:
+            return {}
+        return {name: self._copy(registry['plugins'][name])
+                for name in registry['by_tag'].get(tag, [])
+                if module is None or module in registry['plugins'][name]['supported_modules']}
+
+    def get_plugins(self, names):
+        """Return dict name->info for the given plugin names, keeping their order."""
+        registry = self._registry()
+        if not registry:
+            return {}
+        return {name: self._copy(registry['plugins'][name])
+                for name in names if name in registry['plugins']}
+
+    def _build_service_dispatch(self, names, plugins):
+        """Compile every plugin's services_matches into a single regex.
+
+        Each plugin becomes an optional lookahead anchored at the start of the
+        service name, so one match() call reports every plugin whose patterns
+        would have been found by re.search('|'.join(services_matches), service).
+        Plugins without services_matches match every service, as before.
+        """
+        always, groups, parts = [], {}, []
+        for index, name in enumerate(names):
+            matches = plugins[name]['services_matches']
+            if not matches:
+                always.append(name)
+                continue
+            group = f"p{index}"
+            groups[group] = name
+            parts.append(f"(?:(?=.*?(?P<{group}>{'|'.join(matches)})))?")
+
+        try:
+            combined = re.compile(''.join(parts), re.DOTALL)
+        except re.error:
+            # A plugin pattern does not embed cleanly (e.g. its own named groups),
+            # fall back to one compiled regex per plugin.
+            combined = None
+            groups = {name: re.compile('|'.join(plugins[name]['services_matches']))
+                      for name in names if name not in always}
+
+        return {'combined': combined, 'groups': groups, 'always': always, 'order': names, 'memo': {}}
+
+    def match_services(self, service, module="netscan", tag="scans"):
+        """Return the names of the plugins with tag/module whose services_matches match service.
+
+        The dispatch index is built once per registry and results are memoized per
+        distinct service string.
+        """
+        registry = self._registry()
+        if not registry:
+            return []
+
+        key = (module, tag)
+        dispatch = registry['dispatch'].get(key)
+        if dispatch is None:
+            names = [name for name in registry['by_tag'].get(tag, [])
+                     if module in registry['plugins'][name]['supported_modules']]
+            dispatch = self._build_service_dispatch(names, registry['plugins'])
+            registry['dispatch'][key] = dispatch
+
+        if service in dispatch['memo']:
+            return dispatch['memo'][service]
+
+        found = set(dispatch['always'])
+        if dispatch['combined'] is not None:
+            match = dispatch['combined'].match(service)
+            found.update(dispatch['groups'][group]
+                         for group, value in match.groupdict().items() if value is not None)
+        else:
+            found.update(name for name, regex in dispatch['groups'].items() if regex.search(service))
 
+        matched = [name for name in dispatch['order'] if name in found]
+        dispatch['memo'][service] = matched
+        return matched
@@ -4,10 +4,13 @@ import importlib.util
 from pathlib import Path
 import glob
 from helpers.io import info, error, warn, debug
+from helpers.reportstate import FINDINGS_LOG
 
 class ReportsLoader:
-    def __init__(self, module_name):
+    def __init__(self, module_name, incremental=False):
         self.module_name = module_name
+        # Keep parser state between runs and only parse appended log lines
+        self.incremental = incremental
         # Use current working directory (where user runs bit00.py) for logs
         self.current_dir = os.getcwd()
         # Get the project root directory for modules
@@ -48,7 +51,8 @@ class ReportsLoader:
         
         info(f"Searching for logs with pattern: {search_pattern}")
         
-        self.patterns_logs = glob.glob(search_pattern)
+        findings_pattern = os.path.join(os.path.dirname(search_pattern), FINDINGS_LOG)
+        self.patterns_logs = self.select_findings(glob.glob(search_pattern) + glob.glob(findings_pattern))
         
         # Debug: Check if the base directories exist
         if self.module_name == "osint":
@@ -66,9 +70,12 @@ class ReportsLoader:
             for target in targets:
                 logs_dir = os.path.join(base_dir, target, "logs")
                 patterns_file = os.path.join(logs_dir, "patterns.log")
+                findings_file = os.path.join(logs_dir, FINDINGS_LOG)
+                if os.path.exists(findings_file):
+                    debug(f"  Found {FINDINGS_LOG} for {target}: {findings_file}")
                 if os.path.exists(patterns_file):
                     debug(f"  Found patterns.log for {target}: {patterns_file}")
-                else:
+                if not os.path.exists(findings_file) and not os.path.exists(patterns_file):
                     debug(f"  No patterns.log for {target} (logs dir exists: {os.path.exists(logs_dir)})")
         else:
             error(f"Base directory not found: {base_dir}")
@@ -80,13 +87,20 @@ class ReportsLoader:
         
         return self.patterns_logs
 
+    def select_findings(self, paths):
+        """Both logs of a logs directory are parsed, the report parsers only take
+        the patterns.log lines older than findings.jsonl (see legacy_cutoff)"""
+        return sorted(set(paths))
+
     def discover_patterns_logs_from_dir(self, search_dir):
         """Discover all patterns.log files from a specific directory"""
         debug(f"Searching for patterns.log files in: {search_dir}")
         
         # Look for patterns.log files recursively in the given directory
         search_pattern = os.path.join(search_dir, "**", "patterns.log")
-        self.patterns_logs = glob.glob(search_pattern, recursive=True)
+        findings_pattern = os.path.join(search_dir, "**", FINDINGS_LOG)
+        self.patterns_logs = self.select_findings(glob.glob(search_pattern, recursive=True) +
+                                                  glob.glob(findings_pattern, recursive=True))
         
         debug(f"Found {len(self.patterns_logs)} patterns.log files in {search_dir}:")
         for log in self.patterns_logs:
@@ -119,8 +133,12 @@ class ReportsLoader:
                 os.makedirs(self.reports_dir, exist_ok=True)
                 
                 # Pass all discovered patterns logs to the module
-                module.generate_reports(self.patterns_logs, self.reports_dir)
-                info("Successfully generated reports for {bgreen}{self.module_name}{rst}")
+                if self.incremental:
+                    state_path = os.path.join(self.reports_dir, ".state", f"{self.module_name}.state")
+                    module.generate_reports(self.patterns_logs, self.reports_dir, state_path=state_path)
+                else:
+                    module.generate_reports(self.patterns_logs, self.reports_dir)
+                info("Successfully generated reports for {bgreen}{module}{rst}", module=self.module_name)
                 return True
             else:
                 error(f"Module {self.module_name} doesn't have generate_reports function")
@@ -136,7 +154,7 @@ class ReportsLoader:
         """Generate reports for the specific module"""
         mu=self.module_name.upper()
         info("{byellow}{mysc}{rst}", mysc='='*50)
-        info("{byellow}Processing reports for: {mu}{rst}")
+        info("{byellow}Processing reports for: {mu}{rst}", mu=mu)
         info("{byellow}{mysc}{rst}", mysc='='*50)
         
         # First discover all patterns.log files
@@ -152,7 +170,7 @@ class ReportsLoader:
         success = self.load_module_report()
         
         if success:
-            info("Completed {bgreen}{mu}{rst} report generation")
+            info("Completed {bgreen}{mu}{rst} report generation", mu=mu)
             info("Reports saved to: {bblue}{_dir}/{rst}", _dir=self.reports_dir)
         else:
             error(f"Failed to generate {self.module_name.upper()} reports")
@@ -169,7 +187,7 @@ class ReportsLoader:
         mu=self.module_name.upper()
         ddir = search_dir
         info("{byellow}{mysc}{rst}", mysc='='*50)
-        info("{byellow}Processing {mu} reports from directory: {ddir}{rst}")
+        info("{byellow}Processing {mu} reports from directory: {ddir}{rst}", mu=mu, ddir=ddir)
         info("{byellow}{mysc}{rst}", mysc='='*50)
         
         # Validate the search directory
@@ -193,7 +211,7 @@ class ReportsLoader:
         success = self.load_module_report()
         
         if success:
-            info("Completed {bgreen}{mu}{rst} report generation")
+            info("Completed {bgreen}{mu}{rst} report generation", mu=mu)
             info("Reports saved to: {bblue}{re_dir}{rst}/", re_dir=self.reports_dir)
         else:
             error(f"Failed to generate {self.module_name.upper()} reports")
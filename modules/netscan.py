@@ -1,6 +1,5 @@
 """Network scanning module for enumeration and vulnerability discovery."""
 import os
-import re
 import time
 import asyncio
 from concurrent.futures import FIRST_COMPLETED
@@ -34,8 +33,7 @@ class netscan:
         self.plugins = {}
     
     def loader_plugins(self):
-        p_loader.list_plugins()
-        return {m: props for m, props in p_loader.list_plugins().items() if "netscan" in props["supported_modules"]}
+        return p_loader.get_plugins_by_module("netscan")
 
     def setup_plugins(self, profile):
         if profile == 'full':
@@ -49,12 +47,12 @@ class netscan:
         return {m: props for m, props in plugins.items() if plugin_name in props["name"]}
     
     def setup_scan_sslplugins(self, service):
-        return {m: props for m, props in self.loader_plugins().items() 
-                if "scans" in props["tag"] and (re.search('|'.join(props["services_matches"]), service)) or m == 'SSLScan'}
+        matched = p_loader.match_services(service, module="netscan", tag="scans")
+        return p_loader.get_plugins(matched + [m for m in ['SSLScan'] if m not in matched])
     
     def setup_scan_plugins(self, service):
-        return {m: props for m, props in self.loader_plugins().items() 
-                if "scans" in props["tag"] and re.search('|'.join(props["services_matches"]), service) and m != 'SSLScan'}
+        matched = p_loader.match_services(service, module="netscan", tag="scans")
+        return p_loader.get_plugins([m for m in matched if m != 'SSLScan'])
         
     def check_run_once(self, plug, props):
         if props['run_once'] == True:
@@ -164,7 +162,7 @@ class netscan:
 
             module = props['supported_modules'][0]
             props["tag"].append(self.target)
-            props["tag"][1] = f"{props["tag"][1]}:{protocol}/{port}/{service}"
+            props["tag"][1] = f"{props['tag'][1]}:{protocol}/{port}/{service}"
                     
             plugin = p_loader.load_plugin(props["path"])
             try:
@@ -186,6 +184,10 @@ class netscan:
     async def portscan(self):
 
         debug("Starting NetScan Enumeration on target: {byellow}{target}{rst}", target=self.target)
+        # Set up by --batch-portscan in single-loop mode
+        from core.portbatch import get_batcher
+        from core.config import admit_target
+        batcher = get_batcher()
         
         for plug, props in self.plugins.items():
             if not self.check_run_once(plug=plug, props=props):
@@ -197,14 +199,18 @@ class netscan:
             try:
                 debug("Plugin instance initialized:  {bgreen}{plugin}{rst}", plugin=plug)
                 
-                self.pending.append(asyncio.create_task(plugin.run(
+                if batcher is not None and batcher.accepts(plugin, self.target):
+                    scan = batcher.submit(plugin, plug, self.target, props["tag"], self.basedir, module)
+                else:
+                    # Batched targets are let in by their first demultiplexed block
+                    await admit_target()
+                    scan = plugin.run(
                         target= self.target,
                         output = self.basedir, 
                         tag = props["tag"], 
                         module = module
                         )
-                    )
-                )
+                self.pending.append(asyncio.create_task(scan))
             except Exception as e:
                 error("Plugin PortScan {plugin} failed: {_e}", 
                     plugin=plug, _e=str(e))
@@ -305,4 +311,4 @@ class netscan:
             
         except Exception as e:
             error("NetScan error for {target}: {_e}", target=target, _e=str(e))
-            return error("NetScan Error: {target}")
\ No newline at end of file
+            return error("NetScan Error: {target}", target=target)
\ No newline at end of file
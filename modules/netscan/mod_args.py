@@ -15,6 +15,10 @@ def mod_args(subparsers: argparse._SubParsersAction, parents: list) -> argparse.
                                 help='Enable verbose output. Repeat for more verbosity.')
     netscan_parser.add_argument('-o', '--output', action='store', default='recon', dest='outputdir', help='The output directory for results. Default: %(default)s')
     netscan_parser.add_argument('-r', '--results', action='store', default=False, dest='results', help='Create the report in Txt, Json and Xml. Default: It will execute after finish all targets')
+    netscan_parser.add_argument('-I', '--incremental', action='store_true', default=False, dest='incremental', help='Only parse log lines added since the last report and merge them into the saved report state (reports/.state). Default: %(default)s')
+    netscan_parser.add_argument('--sweep', action='store_true', default=False, dest='sweep', help='Find the live hosts of the whole scope with batched Nmap ping scans (-sn) first and only port scan those. Default: %(default)s')
+    netscan_parser.add_argument('--sweep-batch', action='store', type=int, default=4096, dest='sweep_batch', metavar='<number>', help='Addresses probed by each host sweep. Default: %(default)s')
+    netscan_parser.add_argument('--batch-portscan', action='store', type=int, default=0, dest='batch_portscan', metavar='<number>', help='With --single-loop, port scan up to this many IP targets with one Nmap/Naabu run and split its output per host. Up to two batches of targets are port scanned ahead of -ct/--concurrent-targets, which still limits the targets running service scans. Default: %(default)s (one run per target)')
     netscan_parser.add_argument('--only-scans-dir', action='store_true', default=False, help='Only create the "scans" directory for results. Other directories (e.g. exploit, loot, report) will not be created. Default: false')
 
     return subparsers
\ No newline at end of file
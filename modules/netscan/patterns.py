@@ -1,4 +1,12 @@
 PATTERNS = {
+    "sweep": {
+        "NmapHostSweep": [
+            {
+            "description": "alive: {match}",
+            "pattern": r'^Host:\s+(?P<ipaddress>\d{1,3}(?:\.\d{1,3}){3})\s.*Status:\s+Up'
+            }
+        ]
+    },
     "portscan": {
         "NaabuTCPFull": [
             {
@@ -4,12 +4,28 @@ import xml.etree.ElementTree as ET
 from collections import defaultdict
 import re
 from helpers.io import error, info, debug, warn
+from helpers.reportstate import LogTail, ReportState, legacy_cutoff
+from helpers.reportwriter import JsonObject, XmlWriter, write_json
 
-def generate_reports(patterns_log_paths, output_dir):
-    """Generate NETSCAN reports from multiple patterns.log files"""
+def generate_reports(patterns_log_paths, output_dir, state_path=None):
+    """Generate NETSCAN reports from multiple patterns.log files
+
+    With state_path, only the lines appended since the previous run are parsed
+    and merged into the aggregate saved there.
+    """
     debug(f"Generating NETSCAN reports from {len(patterns_log_paths)} log files")
     
     parser = NetScanParser()
+    offsets = {}
+    state = ReportState(state_path) if state_path else None
+    if state and state.load():
+        offsets = state.resume_offsets(patterns_log_paths)
+        if offsets is None:
+            info("Logs changed since the last report, re-parsing them all")
+            state.reset()
+            offsets = {}
+        else:
+            parser.set_state(state.aggregate)
     
     # Parse data from all log files
     all_netscan_data = defaultdict(lambda: defaultdict(list))
@@ -23,7 +39,7 @@ def generate_reports(patterns_log_paths, output_dir):
         file_size = os.path.getsize(log_path)
         debug(f"  Log file size: {file_size} bytes")
         
-        netscan_data = parser.parse_netscan_data(log_path)
+        netscan_data = parser.parse_netscan_data(log_path, offsets.get(log_path, 0))
         
         if not netscan_data:
             error(f"  No NETSCAN data found in: {log_path}")
@@ -45,6 +61,12 @@ def generate_reports(patterns_log_paths, output_dir):
             # Merge services
             all_netscan_data[ip]['services'].extend(data.get('services', []))
     
+    if state:
+        for tail in parser.tails.values():
+            state.update(tail)
+        state.aggregate = parser.get_state()
+        state.save()
+
     info("Total IPs found: {byellow}{total_ips}{rst}", total_ips =len(all_netscan_data))
     
     if not all_netscan_data:
@@ -87,14 +109,15 @@ def remove_duplicates(netscan_data):
                 unique_services.append(service)
             else:
                 duplicate_count += 1
-                debug(f"  Removed duplicate service for {ip}: {service_key}")
+                debug("  Removed duplicate service for {ip}: {service_key}", ip=ip, service_key=service_key)
         
         deduplicated_data[ip]['services'] = unique_services
         
         original_count = len(data.get('services', []))
         unique_count = len(unique_services)
         if original_count != unique_count:
-            debug(f"  Target {ip}: {original_count} -> {unique_count} services (removed {original_count - unique_count} duplicates)")
+            debug("  Target {ip}: {original_count} -> {unique_count} services (removed {removed} duplicates)",
+                  ip=ip, original_count=original_count, unique_count=unique_count, removed=original_count - unique_count)
     
     debug(f"Removed {duplicate_count} duplicate services total")
     return deduplicated_data
@@ -102,13 +125,33 @@ def remove_duplicates(netscan_data):
 class NetScanParser:
     def __init__(self):
         self.netscan_data = defaultdict(lambda: defaultdict(list))
+        self.tails = {}
+
+    def get_state(self):
+        """Plain (picklable) copy of the parsed data"""
+        return {ip: dict(data) for ip, data in self.netscan_data.items()}
+
+    def set_state(self, state):
+        """Restore data saved by get_state()"""
+        for ip, data in (state or {}).items():
+            self.netscan_data[ip] = data
 
-    def parse_netscan_data(self, patterns_log_path):
+    def _open_log(self, log_path, offset=0):
+        tail = LogTail(log_path, offset)
+        self.tails[log_path] = tail
+        return tail
+
+    def parse_netscan_data(self, patterns_log_path, offset=0):
         """Parse NETSCAN data from a single patterns.log file"""
+        if patterns_log_path.endswith('.jsonl'):
+            return self.parse_netscan_findings(patterns_log_path, offset)
+
         netscan_entries = 0
+        # Later lines are also in findings.jsonl
+        cutoff = legacy_cutoff(patterns_log_path)
 
         try:
-            with open(patterns_log_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with self._open_log(patterns_log_path, offset) as f:
                 for line_num, line in enumerate(f, 1):
                     line = line.strip()
                     if not line:
@@ -127,10 +170,12 @@ class NetScanParser:
                     match = re.match(pattern, line)
                 
                     if not match:
-                        debug(f"    ✗ Line {line_num} doesn't match expected format")
+                        debug("    ✗ Line {line_num} doesn't match expected format", line_num=line_num)
                         continue
 
                     timestamp = match.group(1)  # "20251109:21.53.15"
+                    if cutoff and timestamp >= cutoff:
+                        continue
                     phase = match.group(2)      # "portscan" or "scans"
                     plugin = match.group(3)     # "NmapTCPTop1000" or "NmapHttp"
 
@@ -144,7 +189,7 @@ class NetScanParser:
                     
                         netscan_entries += 1
                         self._process_netscan_entry(plugin, context, ip_address, service_details)
-                        debug(f"    Processed NETSCAN entry #{netscan_entries}")
+                        debug("    Processed NETSCAN entry #{num}", num=netscan_entries)
                 
                     elif phase == 'scans':
                         # Format: [timestamp]:scans:plugin:service:ip:flag:context
@@ -154,24 +199,10 @@ class NetScanParser:
                         flag_type = match.group(6)  # "vuln", "cve", or "tech"
                         context = match.group(7)
                     
-                        debug(f"    {flag_type.upper()} Found - Plugin: '{plugin}', Target: '{ip_address}', Service: '{service}'")
-                        debug(f"    {flag_type.upper()} Details: {context}")
-                    
-                        # Store vulnerability information
-                        if ip_address not in self.netscan_data:
-                            self.netscan_data[ip_address] = {'os': 'Unknown', 'ttl': None, 'services': []}
-                    
-                        if flag_type == 'cve':
-                            self.netscan_data[ip_address]['services'].append((plugin, f"{service} CVE => {context}"))
-                        elif flag_type == 'vuln':
-                            self.netscan_data[ip_address]['services'].append((plugin, f"{service} VULN => {context}"))
-                        elif flag_type == 'tech':
-                            self.netscan_data[ip_address]['services'].append((plugin, f"{service} TECH => {context}"))
-                        else:
-                            self.netscan_data[ip_address]['services'].append((plugin, f"{service} => {context}"))
+                        self._process_scans_entry(plugin, service, ip_address, flag_type, context)
 
                     else:
-                        debug(f"    Skipping - unknown phase: '{phase}'")
+                        debug("    Skipping - unknown phase: '{phase}'", phase=phase)
 
             debug(f"  Processed {netscan_entries} NETSCAN entries")
 
@@ -182,11 +213,64 @@ class NetScanParser:
 
         return self.netscan_data
 
+    def parse_netscan_findings(self, findings_path, offset=0):
+        """Parse NETSCAN data from a structured findings.jsonl file"""
+        netscan_entries = 0
+
+        try:
+            with self._open_log(findings_path, offset) as f:
+                for line_num, line in enumerate(f, 1):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        debug("    ✗ Line {line_num} is not a valid findings record", line_num=line_num)
+                        continue
+
+                    phase = record.get('phase')
+                    if phase == 'portscan':
+                        netscan_entries += 1
+                        self._process_netscan_entry(record.get('plugin'), record.get('value') or '',
+                                                    record.get('target') or '', record.get('service') or '')
+                    elif phase == 'scans':
+                        self._process_scans_entry(record.get('plugin'), record.get('service') or '',
+                                                  record.get('target') or '', record.get('kind') or '',
+                                                  record.get('value') or '')
+                    else:
+                        debug("    Skipping - unknown phase: '{phase}'", phase=phase)
+
+            debug(f"  Processed {netscan_entries} NETSCAN entries")
+
+        except Exception as e:
+            error(f"  Error parsing findings file: {e}")
+            import traceback
+            traceback.print_exc()
+
+        return self.netscan_data
+
+    def _process_scans_entry(self, plugin, service, ip_address, flag_type, context):
+        """Process a single service scan finding (vuln, cve, tech...)"""
+        debug("    {flag} Found - Plugin: '{plugin}', Target: '{ip_address}', Service: '{service}'",
+              flag=flag_type.upper(), plugin=plugin, ip_address=ip_address, service=service)
+        debug("    {flag} Details: {context}", flag=flag_type.upper(), context=context)
+    
+        # Store vulnerability information
+        if ip_address not in self.netscan_data:
+            self.netscan_data[ip_address] = {'os': 'Unknown', 'ttl': None, 'services': []}
+    
+        if flag_type == 'cve':
+            self.netscan_data[ip_address]['services'].append((plugin, f"{service} CVE => {context}"))
+        elif flag_type == 'vuln':
+            self.netscan_data[ip_address]['services'].append((plugin, f"{service} VULN => {context}"))
+        elif flag_type == 'tech':
+            self.netscan_data[ip_address]['services'].append((plugin, f"{service} TECH => {context}"))
+        else:
+            self.netscan_data[ip_address]['services'].append((plugin, f"{service} => {context}"))
+
     def _process_netscan_entry(self, plugin, context, ip_address, service_details):
         """Process a single NETSCAN entry"""
         
         if not self._is_valid_target(ip_address):
-            debug(f"\tInvalid target: {ip_address}")
+            debug("\tInvalid target: {ip_address}", ip_address=ip_address)
             return
 
         # Extract TTL from service_details (look for numbers in parentheses)
@@ -210,7 +294,8 @@ class NetScanParser:
         # Add the service entry
         self.netscan_data[ip_address]['services'].append((plugin, f"{service_details}{context}"))
     
-        debug(f"\tAdded service for {ip_address}: {plugin} - {context} (TTL: {ttl}, OS: {os_type})")
+        debug("\tAdded service for {ip_address}: {plugin} - {context} (TTL: {ttl}, OS: {os_type})",
+              ip_address=ip_address, plugin=plugin, context=context, ttl=ttl, os_type=os_type)
 
     def _is_valid_ip(self, ip):
         """Check if the string is a valid IP address"""
@@ -278,62 +363,54 @@ def generate_netscan_text(netscan_data, output_dir):
     output_path = os.path.join(output_dir, "netscan.txt")
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(content))
-    info("NETSCAN TXT report generated: {bgreen}{output_path}{rst}")
+    info("NETSCAN TXT report generated: {bgreen}{output_path}{rst}", output_path=output_path)
 
 
+def _netscan_json_hosts(netscan_data):
+    """Yield (ip, host report) one host at a time"""
+    for ip, data in netscan_data.items():
+        ttl = data.get('ttl', 'Unknown')
+        os_type = data.get('os', 'Unknown')
+        
+        # Add services as separate objects in an array
+        services_list = [{plugin: context} for plugin, context in data.get('services', [])]
+        
+        yield ip, {
+            "OS": f"{os_type} (ttl={ttl})",
+            "services": services_list
+        }
+
 def generate_netscan_json(netscan_data, output_dir):
     """Generate NETSCAN JSON report"""
-    report = {"NETSCAN": {}}
-    
-    if netscan_data:
-        for ip, data in netscan_data.items():
-            ttl = data.get('ttl', 'Unknown')
-            os_type = data.get('os', 'Unknown')
-            
-            # Create IP entry with OS info
-            report["NETSCAN"][ip] = {
-                "OS": f"{os_type} (ttl={ttl})"
-            }
-            
-            # Add services as separate objects in an array
-            services_list = []
-            for plugin, context in data.get('services', []):
-                service_obj = {
-                    plugin: context
-                }
-                services_list.append(service_obj)
-            
-            # Add services array to the IP entry
-            report["NETSCAN"][ip]["services"] = services_list
+    report = JsonObject([("NETSCAN", JsonObject(_netscan_json_hosts(netscan_data or {})))])
     
     output_path = os.path.join(output_dir, "netscan.json")
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
-    info("NETSCAN JSON report generated: {bgreen}{output_path}{rst}")
+        write_json(f, report)
+    info("NETSCAN JSON report generated: {bgreen}{output_path}{rst}", output_path=output_path)
 
 def generate_netscan_xml(netscan_data, output_dir):
     """Generate NETSCAN XML report"""
-    root = ET.Element("NETSCAN")
-    
-    if netscan_data:
-        for ip, data in netscan_data.items():
-            ip_elem = ET.SubElement(root, "host")
-            ET.SubElement(ip_elem, "ip_address").text = ip
-            ET.SubElement(ip_elem, "os").text = data.get('os', 'Unknown')
-            ET.SubElement(ip_elem, "ttl").text = str(data.get('ttl', 'Unknown'))
-            
-            services_elem = ET.SubElement(ip_elem, "services")
-            for plugin, context in data.get('services', []):
-                service_elem = ET.SubElement(services_elem, "service")
-                ET.SubElement(service_elem, "plugin").text = plugin
-                ET.SubElement(service_elem, "details").text = context
-    else:
-        ET.SubElement(root, "message").text = "No NETSCAN data available"
-    
     output_path = os.path.join(output_dir, "netscan.xml")
-    tree = ET.ElementTree(root)
-    tree.write(output_path, encoding='utf-8', xml_declaration=True)
-    info("NETSCAN XML report generated: {bgreen}{output_path}{rst}")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        xml = XmlWriter(f)
+        with xml.element("NETSCAN"):
+            if netscan_data:
+                for ip, data in netscan_data.items():
+                    with xml.element("host"):
+                        xml.text_element("ip_address", ip)
+                        xml.text_element("os", data.get('os', 'Unknown'))
+                        xml.text_element("ttl", str(data.get('ttl', 'Unknown')))
+                        
+                        with xml.element("services"):
+                            for plugin, context in data.get('services', []):
+                                with xml.element("service"):
+                                    xml.text_element("plugin", plugin)
+                                    xml.text_element("details", context)
+            else:
+                xml.text_element("message", "No NETSCAN data available")
+        xml.close()
+    info("NETSCAN XML report generated: {bgreen}{output_path}{rst}", output_path=output_path)
 
 def create_empty_reports(output_dir, report_type, message):
     """Create empty reports with a message"""
@@ -54,8 +54,7 @@ class osint:
             self.target_type = "domain"
 
     def loader_plugins(self):
-        p_loader.list_plugins()
-        return {m: props for m, props in p_loader.list_plugins().items() if "osint" in props["supported_modules"]}
+        return p_loader.get_plugins_by_module("osint")
 
     def get_plugin(self, plugin_name):
         plugins = self.loader_plugins()
@@ -259,6 +258,6 @@ class osint:
             
         except Exception as e:
             error("OSINT error for {target}: {_e}", target=target, _e=str(e))
-            return error("OSINT Error: {target}")
+            return error("OSINT Error: {target}", target=target)
 
             
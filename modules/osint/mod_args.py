@@ -25,6 +25,8 @@ def mod_args(subparsers, parents) -> argparse.ArgumentParser:
                                 help='Enable verbose output. Repeat for more verbosity.')
     osint_parser.add_argument('-r', '--results', action='store', default=False, dest='results', 
                               help='Create the report in Txt, Json and Xml. Default: It will execute after finish all targets')
+    osint_parser.add_argument('-I', '--incremental', action='store_true', default=False, dest='incremental',
+                              help='Only parse log lines added since the last report and merge them into the saved report state (reports/.state).')
     osint_parser.add_argument('--only-scans-dir', action='store_true', default=False, 
                                   help='Only create the "scans" directory for results.')
     return subparsers
\ No newline at end of file
@@ -3,16 +3,32 @@ import json
 import xml.etree.ElementTree as ET
 from collections import defaultdict
 import re
+import hashlib
 from helpers.io import error, debug, warn, info
+from helpers.reportstate import LogTail, ReportState, legacy_cutoff
+from helpers.reportwriter import JsonObject, XmlWriter, write_json
 
-def generate_reports(patterns_log_paths, output_dir):
-    """Generate OSINT reports from multiple patterns.log files"""
+def generate_reports(patterns_log_paths, output_dir, state_path=None):
+    """Generate OSINT reports from multiple patterns.log files
+
+    With state_path, only the lines appended since the previous run are parsed
+    and merged into the aggregate saved there.
+    """
     debug(f"Generating OSINT reports from {len(patterns_log_paths)} log files")
     
     parser = OSINTParser()
+    offsets = {}
+    state = ReportState(state_path) if state_path else None
+    if state and state.load():
+        offsets = state.resume_offsets(patterns_log_paths)
+        if offsets is None:
+            info("Logs changed since the last report, re-parsing them all")
+            state.reset()
+            offsets = {}
+        else:
+            parser.set_state(state.aggregate)
     
     # Parse data from all log files
-    all_osint_data = defaultdict(lambda: defaultdict(list))
     all_basedomains = set()
     
     for log_path in patterns_log_paths:
@@ -24,7 +40,7 @@ def generate_reports(patterns_log_paths, output_dir):
         file_size = os.path.getsize(log_path)
         debug(f"  Log file size: {file_size} bytes")
         
-        osint_data, basedomains = parser.parse_osint_data(log_path)
+        osint_data, basedomains = parser.parse_osint_data(log_path, offsets.get(log_path, 0))
         
         for domain in basedomains:
             all_basedomains.add(domain)
@@ -32,16 +48,19 @@ def generate_reports(patterns_log_paths, output_dir):
         if not osint_data:
             error(f"  No OSINT data found in: {log_path}")
             continue
-            
-        # Merge data from all logs
-        for target, data in osint_data.items():
-            debug(f"  Found target: {target} with {sum(len(entries) for entries in data.values())} entries")
-            for data_type, entries in data.items():
-                # Add only unique entries
-                for entry in entries:
-                    if not _is_duplicate_entry(all_osint_data[target][data_type], entry):
-                        all_osint_data[target][data_type].append(entry)
+
+    # The parser accumulates every log and keeps its entries unique (entry_keys)
+    all_osint_data = parser.osint_data
+    for target, data in all_osint_data.items():
+        debug("  Found target: {target} with {num} entries", target=target,
+              num=sum(len(entries) for entries in data.values()))
     
+    if state:
+        for tail in parser.tails.values():
+            state.update(tail)
+        state.aggregate = parser.get_state()
+        state.save()
+
     #info("Base domains: {byellow}{base_domain}{rst}", base_domain=list(all_basedomains))
     info("Total subdomains found: {byellow}{num}{rst}", num=len(all_osint_data))
     
@@ -56,14 +75,9 @@ def generate_reports(patterns_log_paths, output_dir):
     generate_osint_json(all_osint_data, all_basedomains, output_dir)
     generate_osint_xml(all_osint_data, all_basedomains, output_dir)
 
-def _is_duplicate_entry(existing_entries, new_entry):
-    """Check if an entry already exists in the list"""
-    for existing_entry in existing_entries:
-        if (existing_entry.get('plugin') == new_entry.get('plugin') and 
-            existing_entry.get('content') == new_entry.get('content') and
-            existing_entry.get('info') == new_entry.get('info')):
-            return True
-    return False
+def _entry_key(entry):
+    """Identity of an entry when deduplicating"""
+    return (entry.get('plugin'), entry.get('content'), entry.get('info'))
 
 class OSINTParser:
     def __init__(self):
@@ -71,20 +85,59 @@ class OSINTParser:
         self.basedomains = set()
         self.ip_to_hostname = {}
         self.processed_entries = set()  # Track processed entries to avoid duplicates
+        self.entry_keys = set()  # (target, data_type, plugin, content, info) already in osint_data
+        self.tails = {}
+
+    def get_state(self):
+        """Plain (picklable) copy of the parsed data"""
+        return {
+            'osint_data': {target: dict(data) for target, data in self.osint_data.items()},
+            'basedomains': self.basedomains,
+            'ip_to_hostname': self.ip_to_hostname,
+            'processed_entries': self.processed_entries,
+            'entry_keys': self.entry_keys,
+        }
+
+    def set_state(self, state):
+        """Restore data saved by get_state()"""
+        if not state:
+            return
+        for target, data in state['osint_data'].items():
+            self.osint_data[target].update(data)
+        self.basedomains = state['basedomains']
+        self.ip_to_hostname = state['ip_to_hostname']
+        self.processed_entries = state['processed_entries']
+        self.entry_keys = state.get('entry_keys') or {
+            (target, data_type) + _entry_key(entry)
+            for target, data in self.osint_data.items()
+            for data_type, entries in data.items()
+            for entry in entries
+        }
+
+    def _open_log(self, log_path, offset=0):
+        tail = LogTail(log_path, offset)
+        self.tails[log_path] = tail
+        return tail
 
-    def parse_osint_data(self, patterns_log_path):
+    def parse_osint_data(self, patterns_log_path, offset=0):
         """Parse OSINT data from a single patterns.log file"""
+        if patterns_log_path.endswith('.jsonl'):
+            return self.parse_osint_findings(patterns_log_path, offset)
+
         osint_entries = 0
+        # Later lines are also in findings.jsonl
+        cutoff = legacy_cutoff(patterns_log_path)
         
         try:
-            with open(patterns_log_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with self._open_log(patterns_log_path, offset) as f:
                 for line_num, line in enumerate(f, 1):
                     line = line.strip()
                     if not line:
                         continue
                     
                     # Create a unique identifier for this line to avoid duplicates
-                    line_hash = hash(line)
+                    # Stable across runs, so it can be saved with the report state
+                    line_hash = hashlib.blake2b(line.encode('utf-8', errors='ignore'), digest_size=8).digest()
                     if line_hash in self.processed_entries:
                         continue
                     self.processed_entries.add(line_hash)
@@ -106,6 +159,8 @@ class OSINTParser:
                     
                     # Extract components from regex groups
                     timestamp = match.group(1)  # "20251108:16.19.21"
+                    if cutoff and timestamp >= cutoff:
+                        continue
                     phase = match.group(2)      # "ipnet", "discover", "subdomain"
                     plugin = match.group(3)     # "DNSReconRegisters", "DigEnum", "SpiderfootEmail"
                     target = match.group(4)     # "agetic.gob.bo", "190.14.106.3", etc.
@@ -125,6 +180,37 @@ class OSINTParser:
         
         return self.osint_data, self.basedomains
 
+    def parse_osint_findings(self, findings_path, offset=0):
+        """Parse OSINT data from a structured findings.jsonl file"""
+        osint_entries = 0
+
+        try:
+            with self._open_log(findings_path, offset) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+
+                    plugin = record.get('plugin')
+                    target = record.get('target')
+                    desc = record.get('kind')
+                    content = record.get('value')
+                    if not (plugin and target and desc and content):
+                        continue
+
+                    osint_entries += 1
+                    self._process_osint_entry(plugin, desc, target, content)
+
+            debug(f"  Processed {osint_entries} OSINT entries")
+
+        except Exception as e:
+            error(f"  Error parsing findings file: {e}")
+            import traceback
+            traceback.print_exc()
+
+        return self.osint_data, self.basedomains
+
     def _process_osint_entry(self, plugin, desc, target, content):
         """Process a single OSINT entry"""
         # Extract base domain from target
@@ -160,9 +246,7 @@ class OSINTParser:
                     'plugin': plugin,
                     'content': email
                 }
-                # Check for duplicates before adding
-                if not self._is_duplicate_in_list(self.osint_data[base_domain]['info'], entry):
-                    self.osint_data[base_domain]['info'].append(entry)
+                self._add_entry(base_domain, 'info', entry)
         
         base_domain = self._extract_base_domain(target)
         if content and base_domain:
@@ -170,9 +254,7 @@ class OSINTParser:
                 'plugin': plugin,
                 'content': content
             }
-            # Check for duplicates before adding
-            if not self._is_duplicate_in_list(self.osint_data[base_domain]['info'], entry):
-                self.osint_data[base_domain]['info'].append(entry)
+            self._add_entry(base_domain, 'info', entry)
 
     def _process_domain2ip(self, plugin, target, content):
         """Process domain to IP mapping entries"""
@@ -195,9 +277,7 @@ class OSINTParser:
                     'plugin': plugin,
                     'content': content[:80]  # Limit content length
                 }
-            # Check for duplicates before adding
-            if not self._is_duplicate_in_list(self.osint_data[target_key]['host'], entry):
-                self.osint_data[target_key]['host'].append(entry)
+            self._add_entry(target_key, 'host', entry)
             
 
     def _process_dnsenum(self, plugin, target, content):
@@ -209,9 +289,7 @@ class OSINTParser:
                 'plugin': plugin,
                 'content': content[:500]  # Limit content length
             }
-            # Check for duplicates before adding
-            if not self._is_duplicate_in_list(self.osint_data[base_domain]['dnsenum'], entry):
-                self.osint_data[base_domain]['dnsenum'].append(entry)
+            self._add_entry(base_domain, 'dnsenum', entry)
 
     def _process_geoinfo(self, plugin, target, content):
         """Process geolocation entries"""
@@ -229,9 +307,7 @@ class OSINTParser:
                 'plugin': plugin,
                 'content': content[:80]  # Limit content length
             }
-            # Check for duplicates before adding
-            if not self._is_duplicate_in_list(self.osint_data[target_key]['geoinfo'], entry):
-                self.osint_data[target_key]['geoinfo'].append(entry)
+            self._add_entry(target_key, 'geoinfo', entry)
         else:
             # Target is a domain
             base_domain = self._extract_base_domain(target)
@@ -240,9 +316,7 @@ class OSINTParser:
                     'plugin': plugin,
                     'content': content[:80]  # Limit content length
                 }
-                # Check for duplicates before adding
-                if not self._is_duplicate_in_list(self.osint_data[base_domain]['geoinfo'], entry):
-                    self.osint_data[base_domain]['geoinfo'].append(entry)
+                self._add_entry(base_domain, 'geoinfo', entry)
 
     def _process_ostech(self, plugin, desc, target, content):
         """Process technology entries (tech, ostech, webtech)"""
@@ -259,9 +333,7 @@ class OSINTParser:
                 'plugin': plugin,
                 'content': content[:90]  # Limit content length
             }
-            # Check for duplicates before adding
-            if not self._is_duplicate_in_list(self.osint_data[target_key][desc], entry):
-                self.osint_data[target_key][desc].append(entry)
+            self._add_entry(target_key, desc, entry)
         else:
             # Target is a domain
             base_domain = self._extract_base_domain(target)
@@ -270,9 +342,7 @@ class OSINTParser:
                     'plugin': plugin,
                     'content': content[:90]  # Limit content length
                 }
-                # Check for duplicates before adding
-                if not self._is_duplicate_in_list(self.osint_data[base_domain][desc], entry):
-                    self.osint_data[base_domain][desc].append(entry)
+                self._add_entry(base_domain, desc, entry)
     
     def _process_webtech(self, plugin, desc, target, content):
         """Process technology entries (tech, ostech, webtech)"""
@@ -289,9 +359,7 @@ class OSINTParser:
                 'plugin': plugin,
                 'content': content[:90]  # Limit content length
             }
-            # Check for duplicates before adding
-            if not self._is_duplicate_in_list(self.osint_data[target_key][desc], entry):
-                self.osint_data[target_key][desc].append(entry)
+            self._add_entry(target_key, desc, entry)
         else:
             # Target is a domain
             if target:
@@ -299,18 +367,14 @@ class OSINTParser:
                     'plugin': plugin,
                     'content': content[:90]  # Limit content length
                 }
-                # Check for duplicates before adding
-                if not self._is_duplicate_in_list(self.osint_data[target][desc], entry):
-                    self.osint_data[target][desc].append(entry)             
-
-    def _is_duplicate_in_list(self, entry_list, new_entry):
-        """Check if an entry already exists in the list"""
-        for entry in entry_list:
-            if (entry.get('plugin') == new_entry.get('plugin') and 
-                entry.get('content') == new_entry.get('content') and
-                entry.get('info') == new_entry.get('info')):
-                return True
-        return False
+                self._add_entry(target, desc, entry)             
+
+    def _add_entry(self, target_key, data_type, entry):
+        """Append entry to osint_data[target_key][data_type] unless it is already there"""
+        key = (target_key, data_type) + _entry_key(entry)
+        if key not in self.entry_keys:
+            self.entry_keys.add(key)
+            self.osint_data[target_key][data_type].append(entry)
 
     def _extract_base_domain(self, domain):
         """Extract base domain from full domain"""
@@ -395,89 +459,90 @@ def generate_osint_text(osint_data, basedomains, output_dir):
     output_path = os.path.join(output_dir, "osint.txt")
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(content))
-    info("OSINT TXT report generated: {bgreen}{output_path}{rst}")
+    info("OSINT TXT report generated: {bgreen}{output_path}{rst}", output_path=output_path)
 
-def generate_osint_json(osint_data, basedomains, output_dir):
-    """Generate OSINT JSON report"""
-    report = {"OSINT": {
-        "basedomains": list(basedomains),
-        "basedomain_data": {},
-        "hosts": {}
-    }}
-    
-    if osint_data:
-        # Base domain data
-        for basedomain in basedomains:
-            if basedomain in osint_data:
-                report["OSINT"]["basedomain_data"][basedomain] = {}
-                for data_type, entries in osint_data[basedomain].items():
-                    report["OSINT"]["basedomain_data"][basedomain][data_type] = [
-                        {"plugin": entry['plugin'], "content": entry.get('content', entry.get('info', ''))} 
-                        for entry in entries
-                    ]
-        
-        # Host data
-        for target in osint_data:
-            if ':' in target:
-                hostname, ip = target.split(':')
-                report["OSINT"]["hosts"][target] = {
-                    "hostname": hostname,
-                    "ip": ip,
-                    "data": {}
-                }
-                for data_type, entries in osint_data[target].items():
-                    report["OSINT"]["hosts"][target]["data"][data_type] = [
+def _osint_json_basedomains(osint_data, basedomains):
+    """Yield (basedomain, data) one base domain at a time"""
+    for basedomain in basedomains:
+        if basedomain in osint_data:
+            yield basedomain, {
+                data_type: [
+                    {"plugin": entry['plugin'], "content": entry.get('content', entry.get('info', ''))} 
+                    for entry in entries
+                ]
+                for data_type, entries in osint_data[basedomain].items()
+            }
+
+def _osint_json_hosts(osint_data):
+    """Yield (target, host report) one host at a time"""
+    for target in osint_data:
+        if ':' in target:
+            hostname, ip = target.split(':')
+            yield target, {
+                "hostname": hostname,
+                "ip": ip,
+                "data": {
+                    data_type: [
                         {"plugin": entry['plugin'], "content": entry.get('content', '')} 
                         for entry in entries
                     ]
+                    for data_type, entries in osint_data[target].items()
+                }
+            }
+
+def generate_osint_json(osint_data, basedomains, output_dir):
+    """Generate OSINT JSON report"""
+    osint_data = osint_data or {}
+    report = JsonObject([("OSINT", JsonObject([
+        ("basedomains", list(basedomains)),
+        ("basedomain_data", JsonObject(_osint_json_basedomains(osint_data, basedomains))),
+        ("hosts", JsonObject(_osint_json_hosts(osint_data)))
+    ]))])
     
     output_path = os.path.join(output_dir, "osint.json")
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
-    info("OSINT JSON report generated: {bgreen}{output_path}{rst}")
+        write_json(f, report)
+    info("OSINT JSON report generated: {bgreen}{output_path}{rst}", output_path=output_path)
+
+def _write_osint_xml_entries(xml, entries_by_type, info_fallback=False):
+    for data_type, entries in entries_by_type.items():
+        for entry in entries:
+            content = entry.get('content', entry.get('info', '') if info_fallback else '')
+            with xml.element("entry"):
+                xml.text_element("type", data_type)
+                xml.text_element("plugin", entry['plugin'])
+                xml.text_element("content", content)
 
 def generate_osint_xml(osint_data, basedomains, output_dir):
     """Generate OSINT XML report"""
-    root = ET.Element("OSINT")
-    
-    # Add basedomains
-    basedomains_elem = ET.SubElement(root, "basedomains")
-    for basedomain in basedomains:
-        basedomain_elem = ET.SubElement(basedomains_elem, "basedomain")
-        basedomain_elem.text = basedomain
-        
-        # Add basedomain data
-        if basedomain in osint_data:
-            basedata_elem = ET.SubElement(root, "basedomain_data")
-            basedata_elem.set("domain", basedomain)
-            for data_type, entries in osint_data[basedomain].items():
-                for entry in entries:
-                    entry_elem = ET.SubElement(basedata_elem, "entry")
-                    ET.SubElement(entry_elem, "type").text = data_type
-                    ET.SubElement(entry_elem, "plugin").text = entry['plugin']
-                    ET.SubElement(entry_elem, "content").text = entry.get('content', entry.get('info', ''))
-    
-    # Add hosts
-    hosts_elem = ET.SubElement(root, "hosts")
-    for target in osint_data:
-        if ':' in target:
-            host_elem = ET.SubElement(hosts_elem, "host")
-            hostname, ip = target.split(':')
-            ET.SubElement(host_elem, "hostname").text = hostname
-            ET.SubElement(host_elem, "ip").text = ip
-            
-            data_elem = ET.SubElement(host_elem, "data")
-            for data_type, entries in osint_data[target].items():
-                for entry in entries:
-                    entry_elem = ET.SubElement(data_elem, "entry")
-                    ET.SubElement(entry_elem, "type").text = data_type
-                    ET.SubElement(entry_elem, "plugin").text = entry['plugin']
-                    ET.SubElement(entry_elem, "content").text = entry.get('content', '')
-    
     output_path = os.path.join(output_dir, "osint.xml")
-    tree = ET.ElementTree(root)
-    tree.write(output_path, encoding='utf-8', xml_declaration=True)
-    info("OSINT XML report generated: {bgreen}{output_path}{rst}")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        xml = XmlWriter(f)
+        with xml.element("OSINT"):
+            # Add basedomains
+            with xml.element("basedomains"):
+                for basedomain in basedomains:
+                    xml.text_element("basedomain", basedomain)
+            
+            # Add basedomain data
+            for basedomain in basedomains:
+                if basedomain in osint_data:
+                    with xml.element("basedomain_data", {"domain": basedomain}):
+                        _write_osint_xml_entries(xml, osint_data[basedomain], info_fallback=True)
+            
+            # Add hosts
+            with xml.element("hosts"):
+                for target in osint_data:
+                    if ':' in target:
+                        with xml.element("host"):
+                            hostname, ip = target.split(':')
+                            xml.text_element("hostname", hostname)
+                            xml.text_element("ip", ip)
+                            
+                            with xml.element("data"):
+                                _write_osint_xml_entries(xml, osint_data[target])
+        xml.close()
+    info("OSINT XML report generated: {bgreen}{output_path}{rst}", output_path=output_path)
 
 def create_empty_reports(output_dir, report_type, message):
     """Create empty reports with a message"""
@@ -13,6 +13,7 @@ class AmassRevLookUp:
     supported_modules: List[str] = field(default_factory=lambda: ["osint"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = True
+    cost: int = 4
 
 
     async def run(target, tag, output, module):
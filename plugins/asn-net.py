@@ -11,6 +11,7 @@ class AsnNet:
     supported_modules: List[str] = field(default_factory=lambda: ["osint"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = False
+    cache_ttl: int = 604800
         
     async def run(target, tag, output, module):
 
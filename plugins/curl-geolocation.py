@@ -12,6 +12,7 @@ class CurlGeolocation:
     supported_modules: List[str] = field(default_factory=lambda: ["osint"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = False
+    cache_ttl: int = 604800
 
     
     async def run(target, tag, output, module):
@@ -12,6 +12,7 @@ class DigEnum:
     supported_modules: List[str] = field(default_factory=lambda: ["osint"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = False
+    cache_ttl: int = 86400
         
     
     async def run(target, tag, output, module):
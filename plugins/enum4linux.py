@@ -12,6 +12,7 @@ class Enum4linux:
     supported_modules: List[str] = field(default_factory=lambda: ["netscan"])
     services_matches: Tuple[str, ...] = field(default=('^smb', '^microsoft-ds', '^netbios'))
     run_once: bool = True
+    cost: int = 2
         
     
     async def run(self, target, tag, output, service, protocol, port, module):
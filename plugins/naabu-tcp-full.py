@@ -13,6 +13,7 @@ class NaabuTCPFull:
     supported_modules: List[str] = field(default_factory=lambda: ["netscan"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = True
+    cost: int = 6
 
     async def run(target, tag, output, module):
 
@@ -21,4 +22,9 @@ class NaabuTCPFull:
 -oG {output}/scans/gnmap/_top_1000_tcp_naabunmap.gnmap -oN {output}/scans/_top_1000_tcp_naabunmap.txt -oX {output}/scans/xml/_top_1000_tcp_naabunmap.xml'"
         
         return await runcommand(cmd=cmd, tag=tag, output=output, module=module)
-    
\ No newline at end of file
+
+    def batch_cmd(targets_file, output, name):
+
+        """Same scan over every address listed in targets_file, see core.portbatch."""
+        return f"/usr/bin/naabu -list {targets_file} -silent -no-color -c 10 -rate 1000 --top-ports full -nmap-cli '-vv -Pn --min-rate=1000 -T4 --open -O --osscan-guess --max-os-tries 5 -sV --traceroute --disable-arp-ping --source-port 53 \
+-oG {output}/scans/gnmap/{name}.gnmap -oN {output}/scans/{name}.txt -oX {output}/scans/xml/{name}.xml'"
@@ -0,0 +1,26 @@
+"""Nmap host discovery plugin."""
+import os
+from dataclasses import dataclass, field
+from typing import List, Tuple
+from core.runcmd import runcommand
+
+@dataclass
+class NmapHostSweep:
+    """Ping sweep of a whole target list"""
+    name: str = "NmapHostSweep"
+    description: str = "Finds the live hosts of a target list with a single Nmap ping scan (-sn)."
+    tag: List[str] = field(default_factory=lambda: ["sweep", "NmapHostSweep"])
+    supported_modules: List[str] = field(default_factory=lambda: ["netscan"])
+    services_matches: Tuple[str, ...] = field(default_factory=tuple)
+    run_once: bool = True
+    cost: int = 4
+
+    async def run(target, tag, output, module):
+
+        """Run nmap ping scan, target is a file of addresses (-iL) or a single target."""
+        targets = f"-iL {target}" if os.path.isfile(target) else target
+        name = os.path.splitext(os.path.basename(target))[0]
+        cmd = f"nmap -sn -n -T4 --min-hostgroup 256 -PE -PP -PS21,22,23,25,80,135,139,443,445,3389,8080 -PA80,443 \
+-oN {output}/scans/{name}_host_sweep_nmap.txt -oG - {targets}"
+        
+        return await runcommand(cmd=cmd, tag=tag, output=output, module=module)
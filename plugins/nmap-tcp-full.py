@@ -13,6 +13,7 @@ class NmapTCPFull:
     supported_modules: List[str] = field(default_factory=lambda: ["netscan"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = True
+    cost: int = 8
 
     async def run(target, tag, output, module):
 
@@ -21,4 +22,9 @@ class NmapTCPFull:
 -oG {output}/scans/gnmap/_full_tcp_nmap.gnmap -oN {output}/scans/_full_tcp_nmap.txt -oX {output}/scans/xml/_full_tcp_nmap.xml; "
         
         return await runcommand(cmd=cmd, tag=tag, output=output, module=module)
-    
\ No newline at end of file
+
+    def batch_cmd(targets_file, output, name):
+
+        """Same scan over every address listed in targets_file, see core.portbatch."""
+        return f"nmap -vv -Pn -p- --min-rate=1000 -T4 --open -O --osscan-guess --osscan-limit --max-os-tries 3 -sV --version-all --traceroute --disable-arp-ping --source-port 53 -iL {targets_file} \
+-oG {output}/scans/gnmap/{name}.gnmap -oN {output}/scans/{name}.txt -oX {output}/scans/xml/{name}.xml; "
@@ -13,6 +13,7 @@ class NmapTCPTop1000:
     supported_modules: List[str] = field(default_factory=lambda: ["netscan"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = True
+    cost: int = 3
 
     async def run(target, tag, output, module):
 
@@ -21,5 +22,9 @@ class NmapTCPTop1000:
 -oG {output}/scans/gnmap/_top_1000_tcp_nmap.gnmap -oN {output}/scans/_top_1000_tcp_nmap.txt -oX {output}/scans/xml/_top_1000_tcp_nmap.xml {target};"
         
         return await runcommand(cmd=cmd, tag=tag, output=output, module=module)
-    
-  
\ No newline at end of file
+
+    def batch_cmd(targets_file, output, name):
+
+        """Same scan over every address listed in targets_file, see core.portbatch."""
+        return f"nmap -vv -Pn --top-ports=1000 --min-rate=1000 -T4 --open -O --osscan-guess --osscan-limit --max-os-tries 5 -sV --traceroute --disable-arp-ping --source-port 53 \
+-oG {output}/scans/gnmap/{name}.gnmap -oN {output}/scans/{name}.txt -oX {output}/scans/xml/{name}.xml -iL {targets_file};"
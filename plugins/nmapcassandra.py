@@ -12,6 +12,7 @@ class NmapCassandra:
     supported_modules: List[str] = field(default_factory=lambda: ["netscan"])
     services_matches: Tuple[str, ...] = field(default=('^apani1',))
     run_once: bool = False
+    cost: int = 2
         
 
     
@@ -12,6 +12,7 @@ class NmapRedis:
     supported_modules: List[str] = field(default_factory=lambda: ["netscan"])
     services_matches: Tuple[str, ...] = field(default=('^redis$',))
     run_once: bool = False
+    cost: int = 2
         
        
     async def run(target, tag, output, service, protocol, port, module):
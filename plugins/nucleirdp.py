@@ -12,6 +12,7 @@ class NucleiRdp:
     supported_modules: List[str] = field(default_factory=lambda: ["netscan"])
     services_matches: Tuple[str, ...] = field(default=('^rdp', '^ms-wbt-server', '^ms-term-serv'))
     run_once: bool = False
+    cost: int = 3
         
     
     async def run(target, tag, output, service, protocol, port, module):
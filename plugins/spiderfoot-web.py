@@ -11,6 +11,7 @@ class SpiderfootWeb:
     supported_modules: List[str] = field(default_factory=lambda: ["osint"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = False
+    cost: int = 6
     
     async def run(target, tag, output, module):
 
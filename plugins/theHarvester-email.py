@@ -11,6 +11,7 @@ class TheHarvesterEmail:
     supported_modules: List[str] = field(default_factory=lambda: ["osint"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = True
+    cost: int = 3
     
     async def run(target, tag, output, module):
 
@@ -12,6 +12,7 @@ class TheHarvester:
     supported_modules: List[str] = field(default_factory=lambda: ["osint"])
     services_matches: Tuple[str, ...] = field(default_factory=tuple)
     run_once: bool = True
+    cost: int = 4
     
     async def run(target, tag, output, module):
 